@@ -1,20 +1,85 @@
+import asyncio
 import os
+import re
+import sys
 import json
-import subprocess
+import threading
+from collections import OrderedDict
 from pathlib import Path
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 
+# orjson (C/Rust serializer) is ~3-5x faster than stdlib json for the payload
+# artifact and responses; keep stdlib json as the fallback.
+try:
+    import orjson
+    from fastapi.responses import ORJSONResponse as _ResponseClass
+except Exception:
+    orjson = None
+    from fastapi.responses import JSONResponse as _ResponseClass
+
 BASE = Path(__file__).resolve().parents[1]  # .../Newcastle
-ENGINE = BASE / "plana" / "engine" / "run_engine.py"
-RENDER = BASE / "scripts" / "render_council_report.py"
+ENGINE_SRC = BASE / "plana" / "engine" / "src"
 LOGS = BASE / "logs"
 
+# Ensure the engine package and scripts/ are importable in-process
+for p in (str(BASE), str(ENGINE_SRC)):
+    if p not in sys.path:
+        sys.path.insert(0, p)
+
+from plana_engine.report.report_entrypoint import generate_report_payload
+from scripts.render_council_report import render_report
+
+DOC_KEYS = ["dap_2020", "csucp_2015", "nppf_2024"]
+
+
+def _dump_payload_bytes(payload) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_INDENT_2)
+    return json.dumps(payload, indent=2).encode("utf-8")
+
+
+def _normalize_proposal(text: str) -> str:
+    return re.sub(r"\s+", " ", text.strip().lower())
+
+
+# Hand-rolled LRU instead of functools.lru_cache: the cache key is the
+# normalized text, but the engine must see the user's original text —
+# the normalized form would leak into the payload and rendered report.
+_ENGINE_CACHE: "OrderedDict[tuple, str]" = OrderedDict()
+_ENGINE_CACHE_MAX = 512
+_ENGINE_CACHE_LOCK = threading.Lock()
+
+
+def _run_engine_cached(raw_text: str, authority: str, doc_keys: tuple) -> str:
+    # Keyed on normalized text so trivially-different submissions
+    # (whitespace/case) hit the cache. Returns JSON so the cached value
+    # is immutable; callers json.loads a fresh dict per request.
+    key = (_normalize_proposal(raw_text), authority, doc_keys)
+    with _ENGINE_CACHE_LOCK:
+        cached = _ENGINE_CACHE.get(key)
+        if cached is not None:
+            _ENGINE_CACHE.move_to_end(key)
+            return cached
+    payload = generate_report_payload(
+        proposal_text=raw_text,
+        authority=authority,
+        doc_keys=list(doc_keys),
+    )
+    payload_json = json.dumps(payload)
+    with _ENGINE_CACHE_LOCK:
+        _ENGINE_CACHE[key] = payload_json
+        if len(_ENGINE_CACHE) > _ENGINE_CACHE_MAX:
+            _ENGINE_CACHE.popitem(last=False)
+    return payload_json
+
+
 class AnalyzeRequest(BaseModel):
     proposal_text: str
 
-app = FastAPI(title="Plana Newcastle C3 Pilot API")
+app = FastAPI(title="Plana Newcastle C3 Pilot API", default_response_class=_ResponseClass)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -27,7 +92,7 @@ def health():
     return {"ok": True}
 
 @app.post("/analyze")
-def analyze(req: AnalyzeRequest):
+async def analyze(req: AnalyzeRequest):
     LOGS.mkdir(parents=True, exist_ok=True)
 
     db_path = os.environ.get("PLANA_DB_PATH", "")
@@ -37,50 +102,30 @@ def analyze(req: AnalyzeRequest):
     payload_path = LOGS / "payload_latest.json"
     report_path = LOGS / "report_latest.md"
 
-    # Run your existing engine (writes JSON to stdout)
-    p = subprocess.run(
-        ["python3", str(ENGINE), req.proposal_text],
-        cwd=str(BASE),
-        capture_output=True,
-        text=True,
-    )
-
-    if p.returncode != 0:
-        return {
-            "ok": False,
-            "error": "Engine failed",
-            "stderr": p.stderr[-4000:],
-            "stdout": p.stdout[-4000:],
-        }
+    # Run the engine in-process (no python3 fork / stdout JSON round-trip).
+    # CPU-bound, so keep it off the event loop.
+    try:
+        payload_json = await run_in_threadpool(
+            _run_engine_cached,
+            req.proposal_text,
+            "newcastle",
+            tuple(DOC_KEYS),
+        )
+        payload = json.loads(payload_json)
+    except Exception as e:
+        return {"ok": False, "error": f"Engine failed: {e}"}
 
-    # Validate/parse JSON
+    # Render needs the dict, not the payload file, so the artifact write and
+    # the render run concurrently.
     try:
-        payload = json.loads(p.stdout)
+        report_md, _ = await asyncio.gather(
+            run_in_threadpool(render_report, payload, payload_source=str(payload_path)),
+            run_in_threadpool(payload_path.write_bytes, _dump_payload_bytes(payload)),
+        )
     except Exception as e:
-        return {
-            "ok": False,
-            "error": f"Engine output not valid JSON: {e}",
-            "stdout_head": p.stdout[:500],
-        }
-
-    payload_path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
-
-    # Render council-style report
-    p2 = subprocess.run(
-        ["python3", str(RENDER), str(payload_path), "-o", str(report_path)],
-        cwd=str(BASE),
-        capture_output=True,
-        text=True,
-    )
-    if p2.returncode != 0:
-        return {
-            "ok": False,
-            "error": "Report render failed",
-            "stderr": p2.stderr[-4000:],
-            "stdout": p2.stdout[-4000:],
-        }
-
-    report_md = report_path.read_text(encoding="utf-8", errors="ignore")
+        return {"ok": False, "error": f"Report render failed: {e}"}
+
+    await run_in_threadpool(report_path.write_text, report_md, encoding="utf-8")
 
     return {
         "ok": True,
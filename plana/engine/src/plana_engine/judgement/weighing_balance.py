@@ -1,17 +1,29 @@
 from __future__ import annotations
 
+import re
 from typing import Any, Dict, List
 
+# Compiled once at import; each topic test is a single C-level scan instead
+# of a rebuilt keyword list + per-keyword substring loop on every call.
+# IGNORECASE avoids allocating a lowercased copy of the input per call.
+HOUSEHOLDER_RE = re.compile(r"rear extension|single storey|two storey|loft|dormer|outbuilding|garage|porch", re.IGNORECASE)
+HERITAGE_RE = re.compile(r"listed|conservation area|heritage|historic", re.IGNORECASE)
+HIGHWAYS_RE = re.compile(r"parking|traffic|highway|visibility|access|junction", re.IGNORECASE)
+FLOOD_RE = re.compile(r"flood|surface water|drainage|suds", re.IGNORECASE)
+
+AMENITY_RE = re.compile(r"amenity|privacy|overlooking|daylight|sunlight|outlook", re.IGNORECASE)
+DESIGN_RE = re.compile(r"design|scale|materials|character", re.IGNORECASE)
+
 
 def _topic_from_text(q: str) -> str:
-    ql = (q or "").lower()
-    if any(k in ql for k in ["rear extension", "single storey", "two storey", "loft", "dormer", "outbuilding", "garage", "porch"]):
+    q = q or ""
+    if HOUSEHOLDER_RE.search(q):
         return "householder"
-    if any(k in ql for k in ["listed", "conservation area", "heritage", "historic"]):
+    if HERITAGE_RE.search(q):
         return "heritage"
-    if any(k in ql for k in ["parking", "traffic", "highway", "visibility", "access", "junction"]):
+    if HIGHWAYS_RE.search(q):
         return "highways"
-    if any(k in ql for k in ["flood", "surface water", "drainage", "suds"]):
+    if FLOOD_RE.search(q):
         return "flood"
     return "general"
 
@@ -40,13 +52,22 @@ def weigh_balance(proposal_text: str, policy_block: Dict[str, Any]) -> Dict[str,
 
     topic = _topic_from_text(proposal_text)
 
-    # Extract issues from evidence text
-    text_blob = "\n".join((r.get("text") or "")[:4000].lower() for r in results)
+    # Extract issues from evidence text. Scan result-by-result with an early
+    # exit instead of materializing one giant lowercased blob per call.
     issues = []
     if topic == "householder":
-        if any(k in text_blob for k in ["amenity", "privacy", "overlooking", "daylight", "sunlight", "outlook"]):
+        amenity_hit = design_hit = False
+        for r in results:
+            t = (r.get("text") or "")[:4000]
+            if not amenity_hit and AMENITY_RE.search(t):
+                amenity_hit = True
+            if not design_hit and DESIGN_RE.search(t):
+                design_hit = True
+            if amenity_hit and design_hit:
+                break
+        if amenity_hit:
             issues.append("Neighbour amenity (privacy/daylight/outlook)")
-        if any(k in text_blob for k in ["design", "scale", "materials", "character"]):
+        if design_hit:
             issues.append("Design/scale/materials/character")
     if topic == "heritage":
         issues.append("Heritage significance/setting")
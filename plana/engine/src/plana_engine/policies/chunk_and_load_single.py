@@ -4,13 +4,12 @@ from pathlib import Path
 PAGE_RE = re.compile(r"^=== PAGE (\d+) ===$", re.MULTILINE)
 
 def split_pages(text: str):
-    ms = list(PAGE_RE.finditer(text))
+    # Single C-level split (same approach as precedents/chunk_and_load_single);
+    # parts alternate [preamble, pno, text, pno, text, ...]
+    parts = PAGE_RE.split(text)
     out = []
-    for i, m in enumerate(ms):
-        p = int(m.group(1))
-        start = m.end()
-        end = ms[i+1].start() if i+1 < len(ms) else len(text)
-        out.append((p, text[start:end].strip()))
+    for i in range(1, len(parts), 2):
+        out.append((int(parts[i]), parts[i+1].strip()))
     return out
 
 def chunk_pages(pages, max_chars=1500):
@@ -22,11 +21,19 @@ def chunk_pages(pages, max_chars=1500):
             yield idx, p, p, txt[i:i+max_chars].strip()
             idx += 1
 
+_DEFAULT_DB = str(Path(__file__).resolve().parents[3] / "data" / "plana.sqlite")
+
+# Single SQL string so SQLite's statement cache reuses the prepared insert.
+INSERT_CHUNK_SQL = """
+  INSERT INTO policy_chunks(
+    authority, doc_key, doc_title, source_path,
+    page_start, page_end, section_path, paragraph_ref,
+    chunk_index, text
+  ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
 def db_path():
-    return os.getenv(
-        "PLANA_DB_PATH",
-        str(Path(__file__).resolve().parents[3] / "data" / "plana.sqlite")
-    )
+    return os.getenv("PLANA_DB_PATH", _DEFAULT_DB)
 
 def main():
     import argparse
@@ -39,11 +46,15 @@ def main():
     ap.add_argument("--version_label", default=None)
     args = ap.parse_args()
 
-    con = sqlite3.connect(db_path())
-    con.execute("PRAGMA journal_mode=DELETE;")
-    con.execute("PRAGMA synchronous=FULL;")
+    # isolation_level=None: we manage one explicit transaction for the whole
+    # load instead of sqlite3's implicit per-DML transactions.
+    con = sqlite3.connect(db_path(), cached_statements=256, isolation_level=None)
+    con.execute("PRAGMA journal_mode=WAL;")
+    con.execute("PRAGMA synchronous=NORMAL;")
     con.execute("PRAGMA busy_timeout=5000;")
 
+    con.execute("BEGIN IMMEDIATE;")
+
     con.execute("""
       INSERT INTO policy_documents(authority, doc_key, doc_title, source_path, version_label)
       VALUES (?, ?, ?, ?, ?)
@@ -58,20 +69,18 @@ def main():
     raw = Path(args.text_file).read_text(encoding="utf-8", errors="ignore")
     pages = split_pages(raw)
 
-    for idx, p1, p2, txt in chunk_pages(pages):
-        con.execute("""
-          INSERT INTO policy_chunks(
-            authority, doc_key, doc_title, source_path,
-            page_start, page_end, section_path, paragraph_ref,
-            chunk_index, text
-          ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
+    # Generator feeds executemany lazily: no full row list in memory.
+    rows = (
+        (
             args.authority, args.doc_key, args.doc_title, args.source_pdf,
             p1, p2, None, f"pp.{p1}-{p2}#c{idx}",
             idx, txt
-        ))
+        )
+        for idx, p1, p2, txt in chunk_pages(pages)
+    )
+    con.executemany(INSERT_CHUNK_SQL, rows)
 
-    con.commit()
+    con.execute("COMMIT;")
     con.close()
     print(f"Loaded chunks safely: {args.authority}/{args.doc_key}")
 
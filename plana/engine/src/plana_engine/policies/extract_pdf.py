@@ -1,13 +1,37 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+
+# Prefer pypdfium2 (native pdfium backend, ~10x faster on large policy PDFs);
+# fall back to pure-Python pypdf if it isn't installed.
+try:
+    import pypdfium2 as pdfium
+except Exception:
+    pdfium = None
+
 from pypdf import PdfReader
 
+def _extract_page_pypdf(pdf_path: str, page_index: int) -> str:
+    # Worker for the process pool: PdfReader is cheap to re-open per call
+    # and page extraction is CPU-bound, so this bypasses the GIL.
+    r = PdfReader(pdf_path)
+    return r.pages[page_index].extract_text() or ""
+
 def extract(pdf_path: Path, out_txt: Path) -> None:
-    r = PdfReader(str(pdf_path))
     out_txt.parent.mkdir(parents=True, exist_ok=True)
     parts = []
-    for i, page in enumerate(r.pages, start=1):
-        parts.append(f"\n\n=== PAGE {i} ===\n")
-        parts.append(page.extract_text() or "")
+    if pdfium is not None:
+        pdf = pdfium.PdfDocument(str(pdf_path))
+        for i, page in enumerate(pdf, start=1):
+            parts.append(f"\n\n=== PAGE {i} ===\n")
+            parts.append(page.get_textpage().get_text_range() or "")
+    else:
+        n_pages = len(PdfReader(str(pdf_path)).pages)
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as ex:
+            texts = ex.map(_extract_page_pypdf, [str(pdf_path)] * n_pages, range(n_pages))
+            for i, text in enumerate(texts, start=1):
+                parts.append(f"\n\n=== PAGE {i} ===\n")
+                parts.append(text)
     out_txt.write_text("\n".join(parts), encoding="utf-8")
 
 def main():
@@ -1,5 +1,7 @@
 from typing import Dict, Any, List
 
+_CITE_KEYS = ("authority", "doc_key", "doc_title", "paragraph_ref", "page_start", "page_end", "source_path", "score")
+
 def require_policy_evidence(retrieval_out: Dict[str, Any], min_results: int = 3) -> Dict[str, Any]:
     """
     Enforces: no answer without citations.
@@ -16,18 +18,7 @@ def require_policy_evidence(retrieval_out: Dict[str, Any], min_results: int = 3)
             "evidence": []
         }
 
-    citations = []
-    for r in results:
-        citations.append({
-            "authority": r.get("authority"),
-            "doc_key": r.get("doc_key"),
-            "doc_title": r.get("doc_title"),
-            "paragraph_ref": r.get("paragraph_ref"),
-            "page_start": r.get("page_start"),
-            "page_end": r.get("page_end"),
-            "source_path": r.get("source_path"),
-            "score": r.get("score"),
-        })
+    citations = [{k: r.get(k) for k in _CITE_KEYS} for r in results]
 
     return {
         "ok": True,
@@ -33,11 +33,10 @@ def _tokenize(text: str) -> List[str]:
     toks = [t for t in text.split() if len(t) >= 3 and t not in STOPWORDS]
     return toks
 
+_DEFAULT_DB = str(Path(__file__).resolve().parents[3] / "data" / "plana.sqlite")
+
 def db_path() -> str:
-    return os.getenv(
-        "PLANA_DB_PATH",
-        str(Path(__file__).resolve().parents[3] / "data" / "plana.sqlite")
-    )
+    return os.getenv("PLANA_DB_PATH", _DEFAULT_DB)
 
 @dataclass
 class PolicyHit:
@@ -156,27 +155,42 @@ def retrieve_policies(
     con = sqlite3.connect(db_path())
     con.row_factory = sqlite3.Row
 
-    # Pull a candidate set using LIKE on tokens (cheap filter), then score in Python.
-    # Candidate limit protects performance.
-    like_clauses = []
-    like_params = []
-    for tok in q_tokens[:8]:
-        like_clauses.append("text LIKE ?")
-        like_params.append(f"%{tok}%")
-
-    token_where = ""
-    if like_clauses:
-        token_where = (" AND (" + " OR ".join(like_clauses) + ")") if where_sql else ("WHERE " + " OR ".join(like_clauses))
-
-    sql = f"""
-      SELECT authority, doc_key, doc_title, source_path, paragraph_ref, page_start, page_end, text
-      FROM policy_chunks
-      {where_sql}
-      {token_where if token_where else ""}
+    # Pull a candidate set via the FTS5 mirror (indexed token match), then
+    # score in Python. Falls back to LIKE scans on DBs built before the FTS
+    # table existed. Candidate limit protects performance.
+    fts_query = " OR ".join(f'"{tok}"' for tok in q_tokens[:8])
+    fts_where = (where_sql + " AND " if where_sql else "WHERE ") + "policy_chunks_fts MATCH ?"
+    fts_sql = f"""
+      SELECT c.authority, c.doc_key, c.doc_title, c.source_path, c.paragraph_ref,
+             c.page_start, c.page_end, c.text
+      FROM policy_chunks_fts
+      JOIN policy_chunks c ON c.id = policy_chunks_fts.rowid
+      {fts_where}
       LIMIT 400
     """
 
-    rows = con.execute(sql, params + like_params).fetchall()
+    try:
+        rows = con.execute(fts_sql, params + [fts_query]).fetchall()
+    except sqlite3.OperationalError:
+        like_clauses = []
+        like_params = []
+        for tok in q_tokens[:8]:
+            like_clauses.append("text LIKE ?")
+            like_params.append(f"%{tok}%")
+
+        token_where = ""
+        if like_clauses:
+            token_where = (" AND (" + " OR ".join(like_clauses) + ")") if where_sql else ("WHERE " + " OR ".join(like_clauses))
+
+        sql = f"""
+          SELECT authority, doc_key, doc_title, source_path, paragraph_ref, page_start, page_end, text
+          FROM policy_chunks
+          {where_sql}
+          {token_where if token_where else ""}
+          LIMIT 400
+        """
+
+        rows = con.execute(sql, params + like_params).fetchall()
     con.close()
 
     scored: List[PolicyHit] = []
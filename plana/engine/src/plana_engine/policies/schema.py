@@ -2,11 +2,11 @@ import os
 import sqlite3
 from pathlib import Path
 
+# Resolved once at import; resolve() stats the filesystem on every call.
+_DEFAULT_DB = str(Path(__file__).resolve().parents[3] / "data" / "plana.sqlite")
+
 def db_path() -> str:
-    return os.getenv(
-        "PLANA_DB_PATH",
-        str(Path(__file__).resolve().parents[3] / "data" / "plana.sqlite")
-    )
+    return os.getenv("PLANA_DB_PATH", _DEFAULT_DB)
 
 SCHEMA = """
 CREATE TABLE IF NOT EXISTS policy_documents (
@@ -38,8 +38,31 @@ CREATE TABLE IF NOT EXISTS policy_chunks (
 CREATE INDEX IF NOT EXISTS idx_policy_chunks_doc
   ON policy_chunks(authority, doc_key);
 
-CREATE INDEX IF NOT EXISTS idx_policy_chunks_text
-  ON policy_chunks(text);
+-- A b-tree on text can't accelerate LIKE '%...%'; use an FTS5 mirror instead.
+DROP INDEX IF EXISTS idx_policy_chunks_text;
+
+CREATE VIRTUAL TABLE IF NOT EXISTS policy_chunks_fts USING fts5(
+  text, content='policy_chunks', content_rowid='id'
+);
+
+CREATE TRIGGER IF NOT EXISTS policy_chunks_fts_ai AFTER INSERT ON policy_chunks BEGIN
+  INSERT INTO policy_chunks_fts(rowid, text) VALUES (new.id, new.text);
+END;
+
+CREATE TRIGGER IF NOT EXISTS policy_chunks_fts_ad AFTER DELETE ON policy_chunks BEGIN
+  INSERT INTO policy_chunks_fts(policy_chunks_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+
+CREATE TRIGGER IF NOT EXISTS policy_chunks_fts_au AFTER UPDATE ON policy_chunks BEGIN
+  INSERT INTO policy_chunks_fts(policy_chunks_fts, rowid, text) VALUES ('delete', old.id, old.text);
+  INSERT INTO policy_chunks_fts(rowid, text) VALUES (new.id, new.text);
+END;
+
+-- Backfill: the triggers only cover rows inserted after the mirror
+-- exists, so re-index from the content table for databases ingested
+-- before this migration. 'rebuild' is idempotent and cheap to repeat
+-- at this table size.
+INSERT INTO policy_chunks_fts(policy_chunks_fts) VALUES ('rebuild');
 """
 
 def main():
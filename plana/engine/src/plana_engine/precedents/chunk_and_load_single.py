@@ -6,6 +6,12 @@ from typing import List, Tuple
 
 PAGE_RE = re.compile(r"=== PAGE (\d+) ===")
 
+# Single SQL string so SQLite's statement cache reuses the prepared insert.
+INSERT_CHUNK_SQL = """
+    INSERT INTO precedent_chunks(authority, case_key, doc_title, source_path, chunk_index, page_start, page_end, paragraph_ref, text)
+    VALUES(?,?,?,?,?,?,?,?,?)
+"""
+
 def db_path() -> str:
     return os.environ.get("PLANA_DB_PATH", "../data/plana.sqlite")
 
@@ -22,14 +28,15 @@ def split_pages(raw: str) -> List[Tuple[int, str]]:
         i += 2
     return out
 
-def chunk_pages(pages: List[Tuple[int, str]], max_chars: int = 3500) -> List[Tuple[int, int, int, str]]:
-    chunks = []
+def chunk_pages(pages: List[Tuple[int, str]], max_chars: int = 3500):
+    # Generator: chunks stream straight into executemany without being
+    # materialized as a list first.
     idx = 0
     for pno, txt in pages:
         if not txt:
             continue
         if len(txt) <= max_chars:
-            chunks.append((idx, pno, pno, txt))
+            yield (idx, pno, pno, txt)
             idx += 1
             continue
         start = 0
@@ -37,10 +44,9 @@ def chunk_pages(pages: List[Tuple[int, str]], max_chars: int = 3500) -> List[Tup
             end = min(start + max_chars, len(txt))
             chunk = txt[start:end].strip()
             if chunk:
-                chunks.append((idx, pno, pno, chunk))
+                yield (idx, pno, pno, chunk)
                 idx += 1
             start = end
-    return chunks
 
 def upsert_doc(con, authority, case_key, reference, address, proposal, decision, decision_date, doc_title, source_path):
     con.execute("""
@@ -59,12 +65,12 @@ def upsert_doc(con, authority, case_key, reference, address, proposal, decision,
 def clear_chunks(con, authority, case_key):
     con.execute("DELETE FROM precedent_chunks WHERE authority=? AND case_key=?", (authority, case_key))
 
-def insert_chunk(con, authority, case_key, doc_title, source_path, chunk_index, page_start, page_end, text):
+def chunk_row(authority, case_key, doc_title, source_path, chunk_index, page_start, page_end, text):
     paragraph_ref = f"pp.{page_start}-{page_end}#c{chunk_index}"
-    con.execute("""
-    INSERT INTO precedent_chunks(authority, case_key, doc_title, source_path, chunk_index, page_start, page_end, paragraph_ref, text)
-    VALUES(?,?,?,?,?,?,?,?,?)
-    """, (authority, case_key, doc_title, source_path, chunk_index, page_start, page_end, paragraph_ref, text))
+    return (authority, case_key, doc_title, source_path, chunk_index, page_start, page_end, paragraph_ref, text)
+
+def insert_chunks(con, rows):
+    con.executemany(INSERT_CHUNK_SQL, rows)
 
 def main():
     import argparse
@@ -82,7 +88,14 @@ def main():
     ap.add_argument("--decision_date", default="")
     args = ap.parse_args()
 
-    con = sqlite3.connect(db_path())
+    # isolation_level=None: we manage one explicit transaction for the whole
+    # load instead of sqlite3's implicit per-DML transactions.
+    con = sqlite3.connect(db_path(), cached_statements=256, isolation_level=None)
+    con.execute("PRAGMA journal_mode=WAL;")
+    con.execute("PRAGMA synchronous=NORMAL;")
+    con.execute("PRAGMA busy_timeout=5000;")
+
+    con.execute("BEGIN IMMEDIATE;")
 
     upsert_doc(
         con,
@@ -103,10 +116,13 @@ def main():
     if not pages:
         raise SystemExit("No page markers found (=== PAGE N ===). Extraction likely failed.")
 
-    for idx, p1, p2, txt in chunk_pages(pages):
-        insert_chunk(con, args.authority, args.case_key, args.doc_title, args.source_pdf, idx, p1, p2, txt)
+    rows = (
+        chunk_row(args.authority, args.case_key, args.doc_title, args.source_pdf, idx, p1, p2, txt)
+        for idx, p1, p2, txt in chunk_pages(pages)
+    )
+    insert_chunks(con, rows)
 
-    con.commit()
+    con.execute("COMMIT;")
     con.close()
     print(f"Loaded precedent chunks: {args.authority}/{args.case_key}")
 
@@ -3,30 +3,60 @@ from dataclasses import dataclass
 from typing import Any, Dict, List, Optional, Tuple
 import re
 
-AMENITY_WORDS = ["residential amenity", "privacy", "overlooking", "daylight", "sunlight", "outlook", "noise", "disturbance"]
-DESIGN_WORDS = ["design", "character", "scale", "massing", "materials", "appearance"]
-HERITAGE_WORDS = ["heritage", "listed", "conservation area", "setting", "significance"]
-HIGHWAYS_WORDS = ["highway", "parking", "traffic", "access", "visibility", "junction"]
-FLOOD_WORDS = ["flood", "drainage", "surface water", "suds"]
-TREES_WORDS = ["tree", "tpo", "arboricultural", "hedgerow"]
+import numpy as np
+
+# Optional Numba kernel for mean-of-top-k; the numpy partition path below is
+# the fallback when numba isn't installed.
+try:
+    from numba import njit
+
+    @njit(cache=True)
+    def _avg_top_k_jit(arr, k):
+        # Single pass keeping the k largest in a small buffer.
+        top = np.full(k, -np.inf)
+        for v in arr:
+            if v > top[0]:
+                top[0] = v
+                # sift the new minimum to slot 0
+                m = 0
+                for j in range(1, k):
+                    if top[j] < top[m]:
+                        m = j
+                if m != 0:
+                    top[0], top[m] = top[m], top[0]
+        s = 0.0
+        n = 0
+        for v in top:
+            if v != -np.inf:
+                s += v
+                n += 1
+        return s / n if n else 0.0
+
+    # Warm-compile so the first request doesn't pay the JIT cost.
+    _avg_top_k_jit(np.zeros(1, dtype=np.float64), 1)
+except Exception:
+    _avg_top_k_jit = None
+
+# One compiled alternation per issue group, built once at import. Each check
+# below is a single regex scan rather than a per-keyword substring loop;
+# IGNORECASE avoids allocating a lowercased copy of the proposal per call.
+ISSUE_RES = [
+    ("householder", re.compile(r"rear extension|single storey|two storey|loft|dormer|outbuilding|porch", re.IGNORECASE)),
+    ("amenity", re.compile(r"residential amenity|privacy|overlooking|daylight|sunlight|outlook|noise|disturbance", re.IGNORECASE)),
+    ("design", re.compile(r"design|character|scale|massing|materials|appearance", re.IGNORECASE)),
+    ("heritage", re.compile(r"heritage|listed|conservation area|setting|significance", re.IGNORECASE)),
+    ("highways", re.compile(r"highway|parking|traffic|access|visibility|junction", re.IGNORECASE)),
+    ("flood", re.compile(r"flood|drainage|surface water|suds", re.IGNORECASE)),
+    ("trees", re.compile(r"tree|tpo|arboricultural|hedgerow", re.IGNORECASE)),
+]
+
+MATERIALS_RE = re.compile(r"materials|match existing", re.IGNORECASE)
+PRIVACY_RE = re.compile(r"privacy|overlooking", re.IGNORECASE)
+HARM_RE = re.compile(r"loss of light|overlooking|overbearing|unacceptable", re.IGNORECASE)
 
 def detect_issues(proposal_text: str) -> List[str]:
-    t = (proposal_text or "").lower()
-    issues = []
-    if any(w in t for w in ["rear extension", "single storey", "two storey", "loft", "dormer", "outbuilding", "porch"]):
-        issues.append("householder")
-    if any(w in t for w in AMENITY_WORDS):
-        issues.append("amenity")
-    if any(w in t for w in DESIGN_WORDS):
-        issues.append("design")
-    if any(w in t for w in HERITAGE_WORDS):
-        issues.append("heritage")
-    if any(w in t for w in HIGHWAYS_WORDS):
-        issues.append("highways")
-    if any(w in t for w in FLOOD_WORDS):
-        issues.append("flood")
-    if any(w in t for w in TREES_WORDS):
-        issues.append("trees")
+    t = proposal_text or ""
+    issues = [name for name, rx in ISSUE_RES if rx.search(t)]
     if not issues:
         issues = ["general"]
     # Deduplicate preserving order
@@ -41,10 +71,13 @@ def detect_issues(proposal_text: str) -> List[str]:
 def _avg_top_scores(evidence: List[Dict[str, Any]], n: int = 6) -> float:
     if not evidence:
         return 0.0
-    scores = [float(e.get("score") or 0.0) for e in evidence]
-    scores.sort(reverse=True)
-    top = scores[:n]
-    return sum(top) / max(1, len(top))
+    # O(N) selection for the top-n instead of a full sort.
+    arr = np.fromiter((e.get("score") or 0.0 for e in evidence), dtype=np.float64, count=len(evidence))
+    k = min(n, arr.size)
+    if _avg_top_k_jit is not None:
+        return float(_avg_top_k_jit(arr, k))
+    top = np.partition(arr, -k)[-k:]
+    return float(top.mean())
 
 def _policy_strength(policy_block: Dict[str, Any]) -> Tuple[bool, float, str]:
     if not policy_block or not policy_block.get("ok"):
@@ -75,9 +108,9 @@ def _draft_householder_conditions(policy_evidence: List[Dict[str, Any]], proposa
     # Keep it conservative; you can enrich later with policy-triggered condition templates.
     conds = []
     conds.append("The development hereby approved shall be carried out in accordance with the approved plans and supporting documents.")
-    if any(k in (proposal_text or "").lower() for k in ["materials", "match existing"]):
+    if MATERIALS_RE.search(proposal_text or ""):
         conds.append("External materials shall match the existing dwelling unless otherwise agreed in writing by the Local Planning Authority.")
-    if any("privacy" in (proposal_text or "").lower() or "overlooking" in (proposal_text or "").lower() for _ in [0]):
+    if PRIVACY_RE.search(proposal_text or ""):
         conds.append("Any side-facing windows serving habitable rooms shall be obscure glazed and non-opening below 1.7m from finished floor level.")
     return conds
 
@@ -115,8 +148,7 @@ def make_recommendation(
 
     # Deterministic “planning balance” starter:
     # - If proposal explicitly mentions harm (loss of light/overlooking) we treat as higher risk → default to approve_with_conditions unless evidence shows refusal.
-    t = (proposal_text or "").lower()
-    harm_flags = any(k in t for k in ["loss of light", "overlooking", "overbearing", "unacceptable"])
+    harm_flags = bool(HARM_RE.search(proposal_text or ""))
 
     # If precedents are enabled, use them to tilt:
     tilt_refuse = False
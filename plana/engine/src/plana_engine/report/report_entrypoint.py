@@ -60,8 +60,11 @@ def generate_report_payload(
 
     results = policy_block["results"]
 
-    citations = [
-        {
+    # Single pass: build citations and accumulate the score sum together.
+    citations = []
+    score_sum = 0.0
+    for r in results:
+        citations.append({
             "authority": r["authority"],
             "doc_key": r["doc_key"],
             "doc_title": r["doc_title"],
@@ -70,11 +73,10 @@ def generate_report_payload(
             "page_end": r["page_end"],
             "source_path": r["source_path"],
             "score": r["score"],
-        }
-        for r in results
-    ]
+        })
+        score_sum += r["score"]  # retrieve_policies scores are already floats
 
-    avg_score = sum(float(r["score"]) for r in results) / len(results)
+    avg_score = score_sum / len(results)
 
     if avg_score >= 3.5:
         decision = "approve_with_conditions"
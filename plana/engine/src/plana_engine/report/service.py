@@ -0,0 +1,52 @@
+"""Long-lived HTTP wrapper around the report generator.
+
+Running report_entrypoint as a CLI pays the full import/load cost per
+proposal. This service loads everything once at startup and serves
+POST /report; the CLI entrypoint stays available for dev runs.
+
+Run: uvicorn plana_engine.report.service:app --workers 1
+"""
+from typing import List, Optional
+
+from fastapi import FastAPI
+from pydantic import BaseModel
+
+from plana_engine.report.report_entrypoint import generate_report_payload
+
+
+class ReportRequest(BaseModel):
+    proposal_text: str
+    authority: str = "newcastle"
+    doc_keys: Optional[List[str]] = None
+    top_k: int = 10
+    min_score: float = 2.0
+
+
+app = FastAPI(title="Plana Report Service")
+
+
+@app.on_event("startup")
+def warm_up():
+    # Importing report_entrypoint above already pulls in retrieve_policies;
+    # issue one throwaway retrieval so the first request doesn't pay for
+    # connection setup either.
+    try:
+        generate_report_payload("warm up retrieval path", doc_keys=None)
+    except Exception:
+        pass
+
+
+@app.get("/health")
+def health():
+    return {"ok": True}
+
+
+@app.post("/report")
+def report(req: ReportRequest) -> dict:
+    return generate_report_payload(
+        proposal_text=req.proposal_text,
+        authority=req.authority,
+        doc_keys=req.doc_keys,
+        top_k=req.top_k,
+        min_score=req.min_score,
+    )
@@ -0,0 +1,44 @@
+"""Shared FAISS search service.
+
+Every CLI invocation pays faiss.read_index (disk read + deserialize) before
+a single query. This service loads the index once — point FAISS_INDEX_PATH
+at /dev/shm for sub-second restarts — and exposes POST /search so the CLI
+tools become thin clients. nprobe/efSearch tuning lives here centrally.
+
+Run: uvicorn plana_engine.search.service:app --port 8766 --workers 1
+"""
+import os
+from typing import List
+
+import faiss
+import numpy as np
+from fastapi import FastAPI
+from pydantic import BaseModel
+
+INDEX_PATH = os.getenv("FAISS_INDEX_PATH", "./index/app_index.faiss")
+
+_INDEX = faiss.read_index(INDEX_PATH)
+if hasattr(_INDEX, "nprobe"):
+    _INDEX.nprobe = int(os.getenv("FAISS_NPROBE", "16"))
+if hasattr(_INDEX, "hnsw"):
+    _INDEX.hnsw.efSearch = int(os.getenv("FAISS_EF_SEARCH", "64"))
+
+
+class SearchRequest(BaseModel):
+    vec: List[float]
+    k: int = 15
+
+
+app = FastAPI(title="Plana FAISS Search Service")
+
+
+@app.get("/health")
+def health():
+    return {"ok": True, "ntotal": int(_INDEX.ntotal)}
+
+
+@app.post("/search")
+def search(req: SearchRequest) -> dict:
+    q = np.asarray(req.vec, dtype="float32").reshape(1, -1)
+    D, I = _INDEX.search(q, req.k)
+    return {"scores": D[0].tolist(), "ids": I[0].tolist()}
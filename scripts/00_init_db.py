@@ -45,10 +45,55 @@ CREATE TABLE IF NOT EXISTS applications (
   url TEXT,
   source TEXT,
   last_seen_utc TEXT,
-  enriched_utc TEXT
+  enriched_utc TEXT,
+  decision_bucket TEXT
 );
 """)
 
+# Older databases predate the decision_bucket column.
+try:
+    cur.execute("ALTER TABLE applications ADD COLUMN decision_bucket TEXT")
+except sqlite3.OperationalError:
+    pass
+
+# Denormalized approved/refused/unknown classification so reasoning can
+# aggregate in SQL instead of re-scanning decision strings per row.
+BUCKET_CASE = """
+CASE
+  WHEN lower(coalesce(decision,'') || ' ' || coalesce(decision_type,'') || ' ' || coalesce(status,''))
+       GLOB '*approv*'
+    OR lower(coalesce(decision,'') || ' ' || coalesce(decision_type,'') || ' ' || coalesce(status,''))
+       GLOB '*grant*'
+    OR lower(coalesce(decision,'') || ' ' || coalesce(decision_type,'') || ' ' || coalesce(status,''))
+       GLOB '*permit*'
+  THEN 'approved'
+  WHEN lower(coalesce(decision,'') || ' ' || coalesce(decision_type,'') || ' ' || coalesce(status,''))
+       GLOB '*refus*'
+  THEN 'refused'
+  ELSE 'unknown'
+END
+"""
+
+cur.execute(f"""
+CREATE TRIGGER IF NOT EXISTS applications_bucket_ai AFTER INSERT ON applications BEGIN
+  UPDATE applications SET decision_bucket = {BUCKET_CASE}
+  WHERE application_ref = new.application_ref;
+END;
+""")
+
+cur.execute(f"""
+CREATE TRIGGER IF NOT EXISTS applications_bucket_au
+AFTER UPDATE OF decision, decision_type, status ON applications BEGIN
+  UPDATE applications SET decision_bucket = {BUCKET_CASE}
+  WHERE application_ref = new.application_ref;
+END;
+""")
+
+cur.execute("CREATE INDEX IF NOT EXISTS ix_app_bucket ON applications(decision_bucket)")
+
+# One-time backfill for rows ingested before the triggers existed.
+cur.execute(f"UPDATE applications SET decision_bucket = {BUCKET_CASE} WHERE decision_bucket IS NULL")
+
 cur.execute("""
 CREATE TABLE IF NOT EXISTS embeddings (
   application_ref TEXT PRIMARY KEY,
@@ -57,6 +102,50 @@ CREATE TABLE IF NOT EXISTS embeddings (
 );
 """)
 
+# Full-text mirror of the searchable application fields, kept in sync by
+# triggers. Used as a cheap keyword pre-filter before FAISS similarity.
+# trigram tokenizer: partial refs like 2020/1234 and postcode fragments
+# stay searchable as substrings (unicode61 would split/drop them).
+cur.execute("""
+CREATE VIRTUAL TABLE IF NOT EXISTS applications_fts USING fts5(
+  application_ref UNINDEXED,
+  proposal,
+  site_address,
+  tokenize='trigram'
+);
+""")
+
+cur.execute("""
+CREATE TRIGGER IF NOT EXISTS applications_fts_ai AFTER INSERT ON applications BEGIN
+  INSERT INTO applications_fts(rowid, application_ref, proposal, site_address)
+  VALUES (new.rowid, new.application_ref, new.proposal, new.site_address);
+END;
+""")
+
+cur.execute("""
+CREATE TRIGGER IF NOT EXISTS applications_fts_ad AFTER DELETE ON applications BEGIN
+  DELETE FROM applications_fts WHERE rowid = old.rowid;
+END;
+""")
+
+cur.execute("""
+CREATE TRIGGER IF NOT EXISTS applications_fts_au AFTER UPDATE ON applications BEGIN
+  DELETE FROM applications_fts WHERE rowid = old.rowid;
+  INSERT INTO applications_fts(rowid, application_ref, proposal, site_address)
+  VALUES (new.rowid, new.application_ref, new.proposal, new.site_address);
+END;
+""")
+
+# One-time backfill for rows ingested before the triggers existed:
+# an empty mirror over a populated table would silently drop every
+# pre-migration application from the keyword pre-filter.
+fts_count = cur.execute("SELECT count(*) FROM applications_fts").fetchone()[0]
+if not fts_count:
+    cur.execute("""
+    INSERT INTO applications_fts(rowid, application_ref, proposal, site_address)
+    SELECT rowid, application_ref, proposal, site_address FROM applications
+    """)
+
 con.commit()
 con.close()
 
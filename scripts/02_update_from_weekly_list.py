@@ -15,20 +15,28 @@ if not WEEKLY_URL:
 RAW_DIR = "./data/raw"
 os.makedirs(RAW_DIR, exist_ok=True)
 
-def upsert(ref, url):
-    now = datetime.now(timezone.utc).isoformat()
+# Compiled once; the per-row search below runs on every table row.
+REF_RE = re.compile(r"\b\d{4}[/\-]\d+\b|\b[A-Z]{1,6}\d{2,}\b")
+
+def open_db():
     con = sqlite3.connect(DB_PATH)
-    cur = con.cursor()
-    cur.execute("""
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("PRAGMA synchronous=NORMAL")
+    return con
+
+def upsert_many(con, items):
+    # One executemany + commit for the whole list instead of a
+    # connect/insert/commit (and fsync) cycle per row.
+    now = datetime.now(timezone.utc).isoformat()
+    con.executemany("""
     INSERT INTO applications(application_ref,url,source,last_seen_utc)
     VALUES(?,?,?,?)
     ON CONFLICT(application_ref) DO UPDATE SET
         url=excluded.url,
         source=excluded.source,
         last_seen_utc=excluded.last_seen_utc
-    """, (ref, url, "weekly_received_idox", now))
+    """, [(ref, url, "weekly_received_idox", now) for ref, url in items])
     con.commit()
-    con.close()
 
 def main():
     with sync_playwright() as p:
@@ -48,33 +56,31 @@ def main():
         with open(snap, "w", encoding="utf-8") as f:
             f.write(html)
 
-        # Pull the data rows directly from the table
-        rows = page.query_selector_all("table tr")
+        # Pull the data rows directly from the table in one evaluate call
+        # (per-cell query_selector/inner_text handles cost a CDP roundtrip each)
+        rows = page.evaluate("""() => Array.from(document.querySelectorAll('table tr')).map(tr => {
+          const tds = Array.from(tr.querySelectorAll('td')).map(td => td.innerText.trim());
+          const a = tr.querySelector('a');
+          return {cells: tds, href: a ? a.getAttribute('href') : null};
+        })""")
 
         items = []
         for r in rows:
-            cells = r.query_selector_all("td")
-            if len(cells) < 3:
+            if len(r["cells"]) < 3:
                 continue
 
-            text_cells = [c.inner_text().strip() for c in cells]
-            joined = " | ".join(text_cells)
+            joined = " | ".join(r["cells"])
 
             # Look for an application reference pattern
-            m = re.search(r"\b\d{4}[/\-]\d+\b|\b[A-Z]{1,6}\d{2,}\b", joined)
+            m = REF_RE.search(joined)
             if not m:
                 continue
 
             ref = m.group(0)
 
-            # Look for clickable link in the row
-            a = r.query_selector("a")
-            if a:
-                href = a.get_attribute("href")
-                if href and href.startswith("/"):
-                    href = "https://portal.newcastle.gov.uk" + href
-            else:
-                href = None
+            href = r["href"]
+            if href and href.startswith("/"):
+                href = "https://portal.newcastle.gov.uk" + href
 
             items.append((ref, href))
 
@@ -87,8 +93,9 @@ def main():
         print("❌ Something changed in Newcastle's portal. We'll handle that next.")
         return
 
-    for ref, url in items:
-        upsert(ref, url)
+    con = open_db()
+    upsert_many(con, items)
+    con.close()
 
     print("✅ Weekly list successfully ingested")
 
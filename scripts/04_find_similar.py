@@ -1,9 +1,13 @@
 import os, json, argparse
 from dotenv import load_dotenv
-from sentence_transformers import SentenceTransformer
 import faiss
 import numpy as np
 
+try:
+    from scripts.embed_cache import get_model
+except ImportError:
+    from embed_cache import get_model
+
 load_dotenv()
 INDEX_PATH = os.getenv("FAISS_INDEX_PATH", "./index/app_index.faiss")
 META_PATH  = os.getenv("FAISS_META_PATH", "./index/meta.jsonl")
@@ -22,9 +26,13 @@ def main():
     args = ap.parse_args()
 
     index = faiss.read_index(INDEX_PATH)
+    # IVF indexes default to nprobe=1 (1 of 256 clusters) — recall
+    # collapses without this
+    if hasattr(index, "nprobe"):
+        index.nprobe = 16
     meta = load_meta(META_PATH)
 
-    model = SentenceTransformer("all-MiniLM-L6-v2")
+    model = get_model("all-MiniLM-L6-v2")
     q = model.encode([args.text], normalize_embeddings=True).astype("float32")
 
     scores, idx = index.search(q, args.k)
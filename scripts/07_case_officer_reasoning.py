@@ -2,6 +2,7 @@
 import argparse
 import json
 import os
+import re
 import sqlite3
 from collections import Counter, defaultdict
 from dataclasses import dataclass
@@ -18,8 +19,11 @@ def load_env():
     # Explicit path avoids dotenv AssertionError in heredocs / stdin execution
     load_dotenv(dotenv_path=Path(".") / ".env")
 
+_WS = re.compile(r"\s+")
+
 def norm_text(s: str) -> str:
-    return " ".join((s or "").strip().split())
+    # Precompiled regex beats split/join on long inputs; skip work for empties.
+    return _WS.sub(" ", s).strip() if s else ""
 
 def safe_float(x, default=0.0):
     try:
@@ -43,26 +47,68 @@ def decision_is_refused(decision: str) -> bool:
     d = (decision or "").lower()
     return "refus" in d or "refuse" in d or "refused" in d
 
+# Keyword groups for the heuristic flags below. With pyahocorasick installed
+# the groups are compiled into one automaton per function at import, so a
+# text is scanned once regardless of how many keywords there are; otherwise
+# we fall back to per-group substring loops.
+try:
+    import ahocorasick
+except Exception:
+    ahocorasick = None
+
+_CONFLICT_GROUPS = [
+    (["hmo", "house in multiple occupation", "bedsit", "multi-occup", "shared house"],
+     "HMO/intensification: check local HMO policies, amenity, waste storage, management plan."),
+    (["rear extension", "two storey", "2 storey", "first floor", "dormer", "loft"],
+     "Design/amenity impacts: daylight/overlooking/scale and character."),
+    (["change of use", "convert", "conversion"],
+     "Change of use: assess suitability of location, noise/amenity, parking, character."),
+    (["parking", "car parking", "dropped kerb", "vehicle access"],
+     "Highways/parking: check parking standards, access safety, traffic impacts."),
+    (["tree", "trees", "tpo", "protected tree"],
+     "Trees: check TPO constraints / arboricultural assessment."),
+    (["listed", "conservation", "heritage"],
+     "Heritage: listed building / conservation area impacts, require heritage statement."),
+]
+
+_CONDITION_GROUPS = [
+    (["extension", "alteration", "elevation"],
+     ["Materials to match existing / sample panels (typical).",
+      "Approved plans / drawings to be complied with (typical)."]),
+    (["hmo", "multi occupation", "shared"],
+     ["Noise management / amenity safeguards (typical for HMO).",
+      "Waste storage provision details (typical)."]),
+    (["parking", "access", "vehicle"],
+     ["Parking/turning area retained and kept available (typical)."]),
+    (["cycle", "bike"],
+     ["Cycle storage details (typical)."]),
+]
+
+def _build_automaton(groups):
+    if ahocorasick is None:
+        return None
+    auto = ahocorasick.Automaton()
+    for gi, (keywords, _) in enumerate(groups):
+        for kw in keywords:
+            auto.add_word(kw, gi)
+    auto.make_automaton()
+    return auto
+
+_CONFLICT_AUTOMATON = _build_automaton(_CONFLICT_GROUPS)
+_CONDITION_AUTOMATON = _build_automaton(_CONDITION_GROUPS)
+
+def _matched_groups(text: str, automaton, groups) -> List[int]:
+    if automaton is not None:
+        return sorted({gi for _, gi in automaton.iter(text)})
+    return [gi for gi, (keywords, _) in enumerate(groups) if any(k in text for k in keywords)]
+
 def infer_policy_conflicts(proposal: str) -> List[str]:
     """
     Lightweight heuristic policy flags (NOT a legal determination).
     This is just for an early pilot until policy docs are integrated.
     """
     p = (proposal or "").lower()
-    flags = []
-    if any(k in p for k in ["hmo", "house in multiple occupation", "bedsit", "multi-occup", "shared house"]):
-        flags.append("HMO/intensification: check local HMO policies, amenity, waste storage, management plan.")
-    if any(k in p for k in ["rear extension", "two storey", "2 storey", "first floor", "dormer", "loft"]):
-        flags.append("Design/amenity impacts: daylight/overlooking/scale and character.")
-    if any(k in p for k in ["change of use", "convert", "conversion"]):
-        flags.append("Change of use: assess suitability of location, noise/amenity, parking, character.")
-    if any(k in p for k in ["parking", "car parking", "dropped kerb", "vehicle access"]):
-        flags.append("Highways/parking: check parking standards, access safety, traffic impacts.")
-    if any(k in p for k in ["tree", "trees", "tpo", "protected tree"]):
-        flags.append("Trees: check TPO constraints / arboricultural assessment.")
-    if any(k in p for k in ["listed", "conservation", "heritage"]):
-        flags.append("Heritage: listed building / conservation area impacts, require heritage statement.")
-    return flags
+    return [_CONFLICT_GROUPS[gi][1] for gi in _matched_groups(p, _CONFLICT_AUTOMATON, _CONFLICT_GROUPS)]
 
 def infer_common_conditions(similar_rows: List[Dict[str, Any]]) -> List[str]:
     """
@@ -71,16 +117,8 @@ def infer_common_conditions(similar_rows: List[Dict[str, Any]]) -> List[str]:
     """
     all_text = " ".join((r.get("proposal") or "") for r in similar_rows).lower()
     conditions = []
-    if any(k in all_text for k in ["extension", "alteration", "elevation"]):
-        conditions.append("Materials to match existing / sample panels (typical).")
-        conditions.append("Approved plans / drawings to be complied with (typical).")
-    if any(k in all_text for k in ["hmo", "multi occupation", "shared"]):
-        conditions.append("Noise management / amenity safeguards (typical for HMO).")
-        conditions.append("Waste storage provision details (typical).")
-    if any(k in all_text for k in ["parking", "access", "vehicle"]):
-        conditions.append("Parking/turning area retained and kept available (typical).")
-    if any(k in all_text for k in ["cycle", "bike"]):
-        conditions.append("Cycle storage details (typical).")
+    for gi in _matched_groups(all_text, _CONDITION_AUTOMATON, _CONDITION_GROUPS):
+        conditions.extend(_CONDITION_GROUPS[gi][1])
     return conditions[:10]
 
 # --------- Data access ---------
@@ -101,10 +139,21 @@ def open_db(db_path: str) -> sqlite3.Connection:
     con.row_factory = sqlite3.Row
     return con
 
-def fetch_application_rows(con: sqlite3.Connection, refs: List[str]) -> Dict[str, Dict[str, Any]]:
+# Column discovery memoized per DB path: the PRAGMA round-trip is pure
+# overhead on every reasoning call otherwise.
+_APP_COLS_CACHE: Dict[str, set] = {}
+
+def get_app_cols(con: sqlite3.Connection, db_path: str) -> set:
+    cols = _APP_COLS_CACHE.get(db_path)
+    if cols is None:
+        cur = con.execute("PRAGMA table_info(applications)")
+        cols = {r["name"] for r in cur.fetchall()}
+        _APP_COLS_CACHE[db_path] = cols
+    return cols
+
+def fetch_application_rows(con: sqlite3.Connection, refs: List[str], db_path: str = "") -> Dict[str, Dict[str, Any]]:
     if not refs:
         return {}
-    qmarks = ",".join("?" for _ in refs)
     # Try to select common fields. If your schema differs, we gracefully fallback.
     candidates = [
         "application_ref",
@@ -113,53 +162,90 @@ def fetch_application_rows(con: sqlite3.Connection, refs: List[str]) -> Dict[str
         "decision",
         "decision_type",
         "status",
+        "decision_bucket",
         "received_date",
         "valid_date",
         "url",
     ]
-    # Discover which columns exist
-    cur = con.cursor()
-    cur.execute("PRAGMA table_info(applications)")
-    cols = {r["name"] for r in cur.fetchall()}
+    cols = get_app_cols(con, db_path)
     sel = [c for c in candidates if c in cols]
     if "application_ref" not in sel:
         raise RuntimeError("DB schema unexpected: 'application_ref' column not found in applications table.")
-    sql = f"SELECT {', '.join(sel)} FROM applications WHERE application_ref IN ({qmarks})"
-    cur.execute(sql, refs)
+    # Chunk the IN list under SQLite's bound-variable limit (999 historically).
     out = {}
-    for row in cur.fetchall():
-        d = dict(row)
-        out[d["application_ref"]] = d
+    cur = con.cursor()
+    for i in range(0, len(refs), 900):
+        chunk = refs[i:i + 900]
+        qmarks = ",".join("?" for _ in chunk)
+        sql = f"SELECT {', '.join(sel)} FROM applications WHERE application_ref IN ({qmarks})"
+        for row in cur.execute(sql, chunk):
+            out[row["application_ref"]] = dict(zip(sel, row))
     return out
 
-def load_meta(meta_path: str) -> List[Dict[str, Any]]:
-    meta = []
-    with open(meta_path, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            meta.append(json.loads(line))
-    return meta
+_FTS_TOKEN_RE = re.compile(r"[a-z0-9]{3,}")
 
-def build_meta_ref_map(meta: List[Dict[str, Any]]) -> List[str]:
+def fts_candidate_refs(con: sqlite3.Connection, query_text: str, phrase: str = "", limit: int = 2000) -> Optional[set]:
+    """
+    Cheap FTS5 keyword pre-filter over proposal/site_address. Returns a set
+    of candidate refs, or None when the FTS table is missing or the query
+    has no usable tokens (callers then skip filtering).
+
+    `phrase` (e.g. the raw address) is added as a quoted phrase term, which
+    with the trigram tokenizer gives substring matching and sidesteps FTS
+    operator-precedence surprises in free text.
+    """
+    toks = _FTS_TOKEN_RE.findall(query_text.lower())[:12]
+    terms = [f'"{t}"' for t in toks]
+    phrase = (phrase or "").strip()
+    if phrase:
+        terms.append('"' + phrase.replace('"', '""') + '"')
+    if not terms:
+        return None
+    match = " OR ".join(terms)
+    try:
+        rows = con.execute(
+            "SELECT application_ref FROM applications_fts WHERE applications_fts MATCH ? LIMIT ?",
+            (match, limit),
+        ).fetchall()
+    except sqlite3.OperationalError:
+        return None
+    refs = {r[0] for r in rows}
+    return refs or None
+
+def load_meta_refs(meta_path: str) -> List[str]:
     """
-    The meta.jsonl should align 1:1 with FAISS vectors.
-    We expect each meta row to include "application_ref".
+    Returns the application refs aligned 1:1 with FAISS vectors.
+
+    Feather meta (written by 03_build_similarity_index) is decoded in C and
+    only the ref column is pulled; meta.jsonl stays supported but pays a
+    json.loads per record.
     """
+    if meta_path.endswith((".feather", ".arrow")):
+        from pyarrow import feather
+        tbl = feather.read_table(meta_path, columns=["application_ref"])
+        return [str(r) for r in tbl.column("application_ref").to_pylist()]
+
     refs = []
-    for i, m in enumerate(meta):
-        r = m.get("application_ref") or m.get("ref") or m.get("application_reference_number")
-        if not r:
-            raise RuntimeError(f"meta.jsonl row {i} missing application_ref/ref field.")
-        refs.append(str(r))
+    with open(meta_path, "r", encoding="utf-8") as f:
+        for i, line in enumerate(f):
+            line = line.strip()
+            if not line:
+                continue
+            m = json.loads(line)
+            r = m.get("application_ref") or m.get("ref") or m.get("application_reference_number")
+            if not r:
+                raise RuntimeError(f"meta.jsonl row {i} missing application_ref/ref field.")
+            refs.append(str(r))
     return refs
 
 # --------- Embeddings ---------
 
 def embed_text(text: str, model_name: str) -> np.ndarray:
-    from sentence_transformers import SentenceTransformer
-    model = SentenceTransformer(model_name)
+    try:
+        from scripts.embed_cache import get_model
+    except ImportError:
+        from embed_cache import get_model
+    model = get_model(model_name)
     vec = model.encode([text], normalize_embeddings=True)
     return np.asarray(vec, dtype="float32")
 
@@ -178,26 +264,53 @@ def run_reasoning(
     query_text = norm_text(f"Use class: {use_class}. Proposal: {proposal}. Address: {address}")
     q = embed_text(query_text, model_name)
 
-    index = faiss.read_index(faiss_path)
-    meta = load_meta(meta_path)
-    meta_refs = build_meta_ref_map(meta)
+    meta_refs = load_meta_refs(meta_path)
 
-    # Search
-    D, I = index.search(q, k)  # D: similarity (if index built with inner product), I: ids
-    ids = I[0].tolist()
-    scores = D[0].tolist()
+    con = open_db(db_path)
 
-    # Map ids -> refs
-    hit_refs = []
-    for idx in ids:
-        if idx < 0:
+    # Keyword pre-filter: restrict hits to applications whose proposal or
+    # address shares tokens with the query, when the FTS mirror exists.
+    candidates = fts_candidate_refs(con, query_text, phrase=address)
+
+    # Search (over-fetch when filtering so k survivors remain)
+    search_k = k * 4 if candidates is not None else k
+
+    # SEARCH_SERVICE_URL points at the shared index service
+    # (plana_engine.search.service), which keeps the index resident instead
+    # of paying faiss.read_index per invocation.
+    search_url = os.getenv("SEARCH_SERVICE_URL")
+    if search_url:
+        import requests
+        resp = requests.post(
+            search_url.rstrip("/") + "/search",
+            json={"vec": q[0].tolist(), "k": search_k},
+            timeout=30,
+        )
+        resp.raise_for_status()
+        body = resp.json()
+        raw_ids, raw_scores = body["ids"], body["scores"]
+    else:
+        index = faiss.read_index(faiss_path)
+        if hasattr(index, "nprobe"):
+            index.nprobe = 16  # IVF indexes: lists scanned per query
+        D, I = index.search(q, search_k)  # D: similarity (if index built with inner product), I: ids
+        raw_ids, raw_scores = I[0].tolist(), D[0].tolist()
+
+    ids = []
+    scores = []
+    for idx, score in zip(raw_ids, raw_scores):
+        if idx < 0 or idx >= len(meta_refs):
             continue
-        if idx >= len(meta_refs):
+        if candidates is not None and meta_refs[idx] not in candidates:
             continue
-        hit_refs.append(meta_refs[idx])
+        ids.append(idx)
+        scores.append(score)
+        if len(ids) >= k:
+            break
 
-    con = open_db(db_path)
-    rows_by_ref = fetch_application_rows(con, hit_refs)
+    hit_refs = [meta_refs[idx] for idx in ids]
+
+    rows_by_ref = fetch_application_rows(con, hit_refs, db_path=db_path)
     con.close()
 
     similar_cases: List[Dict[str, Any]] = []
@@ -211,9 +324,14 @@ def run_reasoning(
         ref = meta_refs[idx]
         row = rows_by_ref.get(ref, {})
         decision = row.get("decision") or row.get("decision_type") or row.get("status") or ""
-        if decision_is_approved(decision):
+        # Prefer the persisted classification (maintained by DB triggers);
+        # fall back to string scanning for rows/DBs without it.
+        bucket = row.get("decision_bucket")
+        if bucket is None:
+            bucket = "approved" if decision_is_approved(decision) else ("refused" if decision_is_refused(decision) else "unknown")
+        if bucket == "approved":
             approved += 1
-        elif decision_is_refused(decision):
+        elif bucket == "refused":
             refused += 1
         else:
             unknown += 1
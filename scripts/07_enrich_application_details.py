@@ -1,12 +1,36 @@
-import sqlite3, time, re
+import argparse, sqlite3, time, re
 from datetime import datetime, timezone
-from playwright.sync_api import sync_playwright
+
+import lxml.html
+import requests
+
+try:
+    from scripts._db import db_open
+except ImportError:
+    from _db import db_open
 
 DB="./db/newcastle_planning.sqlite"
 UA="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36"
 
+# Idox detail pages are server-rendered, so the default path is plain HTTP
+# with keep-alive — no Chromium process, no fixed per-page wait. --js falls
+# back to Playwright for portals that really need script execution.
+SESSION = requests.Session()
+SESSION.headers.update({"User-Agent": UA, "Accept": "text/html,*/*"})
+_adapter = requests.adapters.HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=8,
+    max_retries=requests.adapters.Retry(total=3, backoff_factor=0.5),
+)
+SESSION.mount("https://", _adapter)
+SESSION.mount("http://", _adapter)
+
+def fetch_page_text(url):
+    html = SESSION.get(url, timeout=30).text
+    return lxml.html.fromstring(html).text_content()
+
 def ensure_cols():
-    con=sqlite3.connect(DB)
+    con=db_open(DB)
     cur=con.cursor()
     # add columns if they don't exist
     cols=[r[1] for r in cur.execute("PRAGMA table_info(applications)").fetchall()]
@@ -25,94 +49,168 @@ def ensure_cols():
     add("enriched_utc","TEXT")
     con.commit(); con.close()
 
-def pick_label_value(page, label_patterns):
-    # Idox pages usually show label/value pairs in tables or definition lists
-    text = page.inner_text("body") or ""
-    for pat in label_patterns:
-        m=re.search(pat+r"\s*[:\-]?\s*(.+)", text, re.IGNORECASE)
-        if m:
-            val=m.group(1).strip()
-            val=re.split(r"\s{2,}|\n", val)[0].strip()
-            if 0 < len(val) < 400:
-                return val
-    return None
-
-def main(limit=None, sleep=0.4):
-    ensure_cols()
-    con=sqlite3.connect(DB)
+UPDATE_SQL="""
+UPDATE applications
+SET site_address=?,
+    proposal=?,
+    status=?,
+    decision=?,
+    received_date=?,
+    validated_date=?,
+    case_officer=?,
+    ward=?,
+    parish=?,
+    enriched_utc=?
+WHERE application_ref=?
+"""
+
+# One alternation matched in a single pass over the body text, instead of
+# up to 11 separate full-body re.search calls per page.
+LABEL_RE = re.compile(
+    r"(?P<label>Site\s*Address|Address|Proposal|Description|Status|Decision|"
+    r"Received\s*Date|Date\s*Received|Validated\s*Date|Date\s*Validated|"
+    r"Case\s*Officer|Officer|Ward|Parish)"
+    r"\s*[:\-]?\s*(?P<val>[^\n]{1,400})",
+    re.IGNORECASE,
+)
+
+# alternation label (squashed, lowercased) -> applications column
+LABEL_CANON = {
+    "siteaddress": "site_address", "address": "site_address",
+    "proposal": "proposal", "description": "proposal",
+    "status": "status", "decision": "decision",
+    "receiveddate": "received_date", "datereceived": "received_date",
+    "validateddate": "validated_date", "datevalidated": "validated_date",
+    "caseofficer": "case_officer", "officer": "case_officer",
+    "ward": "ward", "parish": "parish",
+}
+
+_NON_WORD = re.compile(r"\W+")
+_VAL_GAP = re.compile(r"\s{2,}")
+
+def extract_fields(text):
+    fields={}
+    for m in LABEL_RE.finditer(text):
+        key=LABEL_CANON.get(_NON_WORD.sub("", m.group("label")).lower())
+        if not key or key in fields:
+            continue
+        val=_VAL_GAP.split(m.group("val"))[0].strip()
+        if 0 < len(val) < 400:
+            fields[key]=val
+    return fields
+
+def enrich_rows(rows, total, get_text, sleep):
+    # rows is an iterable (streamed cursor); writes go through a separate
+    # connection so read and write cursors never interleave.
+    con=db_open(DB)
     cur=con.cursor()
+
+    # buffer rows and write with one executemany per batch
+    pending=[]
+
+    for i,(ref,url) in enumerate(rows, start=1):
+        try:
+            text = get_text(url) or ""
+        except Exception as e:
+            print(f"[{i}/{total}] {ref} FAIL fetch: {e}")
+            continue
+
+        # best-effort extraction: one regex pass for every field
+        fields = extract_fields(text)
+        enriched = datetime.now(timezone.utc).isoformat()
+        pending.append((
+            fields.get("site_address"),
+            fields.get("proposal"),
+            fields.get("status"),
+            fields.get("decision"),
+            fields.get("received_date"),
+            fields.get("validated_date"),
+            fields.get("case_officer"),
+            fields.get("ward"),
+            fields.get("parish"),
+            enriched,
+            ref,
+        ))
+
+        if i % 25 == 0:
+            cur.executemany(UPDATE_SQL, pending)
+            con.commit()
+            pending=[]
+            print(f"[{i}/{total}] enriched...")
+
+        time.sleep(sleep)
+
+    if pending:
+        cur.executemany(UPDATE_SQL, pending)
+    con.commit()
+    con.close()
+
+def main(limit=None, sleep=0.4, js=False):
+    ensure_cols()
+    read_con=db_open(DB)
     # only enrich rows that have a URL and aren't enriched yet
-    q="""
-    SELECT application_ref, url
-    FROM applications
+    where="""
     WHERE url IS NOT NULL AND url != ''
       AND (enriched_utc IS NULL OR enriched_utc = '')
     """
-    rows=cur.execute(q).fetchall()
-    con.close()
-
+    total=read_con.execute(f"SELECT COUNT(*) FROM applications {where}").fetchone()[0]
+    q=f"SELECT application_ref, url FROM applications {where}"
+    params=()
     if limit:
-        rows=rows[:limit]
-
-    print("To enrich:", len(rows))
-
-    with sync_playwright() as p:
-        browser=p.chromium.launch(headless=True)
-        ctx=browser.new_context(user_agent=UA)
-        page=ctx.new_page()
-        page.set_default_timeout(60000)
-        page.set_default_navigation_timeout(180000)
-
-        con=sqlite3.connect(DB)
-        cur=con.cursor()
-
-        for i,(ref,url) in enumerate(rows, start=1):
-            try:
+        q+=" LIMIT ?"
+        params=(limit,)
+        total=min(total, limit)
+
+    print("To enrich:", total)
+
+    # streamed read cursor — rows are pulled as the loop consumes them
+    rows=read_con.execute(q, params)
+
+    if js:
+        from playwright.sync_api import sync_playwright
+        with sync_playwright() as p:
+            browser=p.chromium.launch(headless=True)
+            state={"ctx": None, "page": None, "count": 0}
+
+            def new_page():
+                if state["ctx"] is not None:
+                    state["ctx"].close()
+                state["ctx"]=browser.new_context(user_agent=UA)
+                page=state["ctx"].new_page()
+                page.set_default_timeout(60000)
+                page.set_default_navigation_timeout(180000)
+                state["page"]=page
+
+            new_page()
+
+            def get_text(url):
+                # recycle the context every 200 URLs — long-lived pages
+                # accumulate DOM state and leak memory
+                if state["count"] and state["count"] % 200 == 0:
+                    new_page()
+                state["count"] += 1
+                page=state["page"]
                 page.goto(url, wait_until="domcontentloaded", timeout=180000)
-                page.wait_for_timeout(1200)
-            except Exception as e:
-                print(f"[{i}/{len(rows)}] {ref} FAIL goto: {e}")
-                continue
-
-            # best-effort extraction from page text
-            site_address = pick_label_value(page, [r"Site\s*Address", r"Address"])
-            proposal     = pick_label_value(page, [r"Proposal", r"Description"])
-            status       = pick_label_value(page, [r"Status"])
-            decision     = pick_label_value(page, [r"Decision"])
-            received     = pick_label_value(page, [r"Received\s*Date", r"Date\s*Received"])
-            validated    = pick_label_value(page, [r"Validated\s*Date", r"Date\s*Validated"])
-            officer      = pick_label_value(page, [r"Case\s*Officer", r"Officer"])
-            ward         = pick_label_value(page, [r"Ward"])
-            parish       = pick_label_value(page, [r"Parish"])
-
-            enriched = datetime.now(timezone.utc).isoformat()
-
-            cur.execute("""
-            UPDATE applications
-            SET site_address=?,
-                proposal=?,
-                status=?,
-                decision=?,
-                received_date=?,
-                validated_date=?,
-                case_officer=?,
-                ward=?,
-                parish=?,
-                enriched_utc=?
-            WHERE application_ref=?
-            """, (site_address, proposal, status, decision, received, validated, officer, ward, parish, enriched, ref))
-
-            if i % 25 == 0:
-                con.commit()
-                print(f"[{i}/{len(rows)}] enriched...")
-
-            time.sleep(sleep)
-
-        con.commit()
-        con.close()
-        browser.close()
-
+                # wait for actual content rather than a blind fixed delay
+                try:
+                    page.wait_for_selector("table, dl", timeout=4000)
+                except Exception:
+                    pass
+                # one IPC roundtrip for the whole body text
+                return page.inner_text("body")
+
+            enrich_rows(rows, total, get_text, sleep)
+            browser.close()
+    else:
+        enrich_rows(rows, total, fetch_page_text, sleep)
+
+    read_con.close()
     print("DONE enrichment.")
 
 if __name__ == "__main__":
-    main()
+    ap=argparse.ArgumentParser()
+    ap.add_argument("--limit", type=int, default=0, help="0 = no limit")
+    ap.add_argument("--sleep", type=float, default=0.4)
+    ap.add_argument("--js", action="store_true", help="render pages in Playwright (for portals that need JS)")
+    args=ap.parse_args()
+    main(limit=args.limit or None, sleep=args.sleep, js=args.js)
@@ -1,8 +1,14 @@
-import argparse, re, sqlite3, time
+import argparse, queue, re, sqlite3, threading, time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from urllib.parse import urlparse
 
+import lxml.html
 import requests
-from bs4 import BeautifulSoup
+
+try:
+    from scripts._db import db_open
+except ImportError:
+    from _db import db_open
 
 DB_DEFAULT = "./db/newcastle_planning.sqlite"
 
@@ -11,6 +17,18 @@ HEADERS = {
     "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
 }
 
+# One session for the whole run: keep-alive reuses the TCP+TLS connection
+# to the portal instead of a fresh handshake per URL.
+SESSION = requests.Session()
+SESSION.headers.update(HEADERS)
+_adapter = requests.adapters.HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=8,
+    max_retries=requests.adapters.Retry(total=3, backoff_factor=0.5),
+)
+SESSION.mount("https://", _adapter)
+SESSION.mount("http://", _adapter)
+
 LABEL_MAP = {
     "decision": ["decision"],
     "decision_type": ["decision type", "decisiontype"],
@@ -18,46 +36,55 @@ LABEL_MAP = {
     "status": ["status", "current status"],
 }
 
+_WS = re.compile(r"\s+")
+
 def norm(s: str) -> str:
-    return re.sub(r"\s+", " ", (s or "").strip()).lower()
+    return _WS.sub(" ", (s or "").strip()).lower()
+
+def _el_text(el) -> str:
+    return " ".join(el.text_content().split())
 
-def extract_kv_pairs(soup: BeautifulSoup) -> dict:
+def extract_kv_pairs(html: str) -> dict:
     """
     Try multiple common portal layouts:
     - table rows with th/td
     - definition lists dt/dd
-    - generic label/value blocks
+    - generic label/value blocks (only if the structured passes find nothing)
     Returns dict of {label_lower: value_text}.
     """
     kv = {}
-
-    # tables: th/td or td/td
-    for tr in soup.select("tr"):
-        cells = [c.get_text(" ", strip=True) for c in tr.find_all(["th","td"])]
-        if len(cells) >= 2:
-            k = norm(cells[0]).rstrip(":")
-            v = cells[1].strip()
-            if k and v and k not in kv:
-                kv[k] = v
-
-    # dl: dt/dd
-    for dt in soup.select("dt"):
-        dd = dt.find_next_sibling("dd")
-        if dd:
-            k = norm(dt.get_text(" ", strip=True)).rstrip(":")
-            v = dd.get_text(" ", strip=True)
-            if k and v and k not in kv:
-                kv[k] = v
-
-    # fallback: scan text for "Label: Value" patterns
-    text = soup.get_text("\n", strip=True)
-    for line in text.splitlines():
-        if ":" in line:
-            left, right = line.split(":", 1)
-            k = norm(left).rstrip(":")
-            v = right.strip()
-            if k and v and k not in kv:
-                kv[k] = v
+    tree = lxml.html.fromstring(html)
+
+    # One XPath traversal instead of separate CSS-selector passes.
+    for el in tree.xpath("//tr[td|th] | //dt"):
+        if el.tag == "tr":
+            cells = [_el_text(c) for c in el.xpath("./th|./td")]
+            if len(cells) >= 2:
+                k = norm(cells[0]).rstrip(":")
+                v = cells[1].strip()
+                if k and v and k not in kv:
+                    kv[k] = v
+        else:
+            dd = el.getnext()
+            if dd is not None and dd.tag == "dd":
+                k = norm(_el_text(el)).rstrip(":")
+                v = _el_text(dd)
+                if k and v and k not in kv:
+                    kv[k] = v
+
+    # fallback: scan text for "Label: Value" patterns — only when a
+    # required field is still missing after the structured passes, since
+    # re-serializing and splitting the whole page text is the expensive
+    # part and well-structured Idox pages never need it.
+    if not all(pick_field(kv, f) is not None for f in LABEL_MAP):
+        text = tree.text_content()
+        for line in text.splitlines():
+            if ":" in line:
+                left, right = line.split(":", 1)
+                k = norm(left).rstrip(":")
+                v = right.strip()
+                if k and v and k not in kv:
+                    kv[k] = v
 
     return kv
 
@@ -70,71 +97,155 @@ def pick_field(kv: dict, field: str) -> str | None:
                 return v.strip() if v else None
     return None
 
+# Partial index over un-enriched rows so --only-missing doesn't scan the
+# whole table once most rows are filled in. The predicate must match the
+# query's for SQLite to use it.
+MISSING_WHERE = (
+    "decision IS NULL OR decision='' OR status IS NULL OR status='' "
+    "OR decision_type IS NULL OR decision_type='' OR decision_date IS NULL OR decision_date=''"
+)
+
+PARTIAL_INDEX_SQL = f"""
+    CREATE INDEX IF NOT EXISTS idx_apps_needs_enrich
+    ON applications(application_ref)
+    WHERE {MISSING_WHERE}
+"""
+
+UPDATE_SQL = """
+    UPDATE applications
+    SET decision = COALESCE(?, decision),
+        decision_type = COALESCE(?, decision_type),
+        decision_date = COALESCE(?, decision_date),
+        status = COALESCE(?, status)
+    WHERE application_ref = ?
+"""
+
 def fetch_html(url: str, timeout=30) -> str:
-    r = requests.get(url, headers=HEADERS, timeout=timeout)
+    r = SESSION.get(url, timeout=timeout)
     r.raise_for_status()
     return r.text
 
+class RateLimiter:
+    """Spaces request starts `interval` seconds apart across all workers,
+    so concurrency doesn't multiply the load on the portal."""
+    def __init__(self, interval: float):
+        self.interval = max(interval, 0.0)
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+def enrich_one(ref: str, url: str, current: tuple, limiter: RateLimiter):
+    limiter.wait()
+    # lxml parses in C; kv extraction walks the tree once via XPath
+    kv = extract_kv_pairs(fetch_html(url))
+    parsed = (
+        pick_field(kv, "decision"),
+        pick_field(kv, "decision_type"),
+        pick_field(kv, "decision_date"),
+        pick_field(kv, "status"),
+    )
+    # COALESCE keeps existing values where parsed is None, so the UPDATE is
+    # a no-op (but still a WAL write) unless some parsed value differs —
+    # common on re-runs. Skip those rows entirely.
+    if all(p is None or p == c for p, c in zip(parsed, current)):
+        return None
+    return parsed + (ref,)
+
+def writer_loop(db_path: str, results: queue.Queue):
+    # Single writer keeps SQLite single-writer-safe while fetch workers fan out.
+    con = db_open(db_path)
+    cur = con.cursor()
+    pending = []
+    try:
+        while True:
+            item = results.get()
+            if item is None:
+                break
+            pending.append(item)
+            if len(pending) >= 100:
+                cur.executemany(UPDATE_SQL, pending)
+                con.commit()
+                pending.clear()
+    finally:
+        if pending:
+            cur.executemany(UPDATE_SQL, pending)
+            con.commit()
+        con.close()
+
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--db", default=DB_DEFAULT)
     ap.add_argument("--sleep", type=float, default=0.5)
     ap.add_argument("--limit", type=int, default=0, help="0 = no limit")
     ap.add_argument("--only-missing", action="store_true", help="only rows missing decision/status/etc")
+    ap.add_argument("--workers", type=int, default=8)
     args = ap.parse_args()
 
-    con = sqlite3.connect(args.db)
+    con = db_open(args.db)
     cur = con.cursor()
 
     where = "url IS NOT NULL AND url != ''"
     if args.only_missing:
-        where += " AND (decision IS NULL OR decision='' OR status IS NULL OR status='' OR decision_type IS NULL OR decision_type='' OR decision_date IS NULL OR decision_date='')"
+        cur.execute(PARTIAL_INDEX_SQL)
+        where += f" AND ({MISSING_WHERE})"
 
-    q = f"SELECT application_ref, url FROM applications WHERE {where}"
-    cur.execute(q)
-    rows = cur.fetchall()
+    q = f"SELECT application_ref, url, decision, decision_type, decision_date, status FROM applications WHERE {where}"
+    params = ()
     if args.limit and args.limit > 0:
-        rows = rows[:args.limit]
-
-    print(f"Found {len(rows)} rows to enrich")
+        q += " LIMIT ?"
+        params = (args.limit,)
 
     updated = 0
+    unchanged = 0
     failed = 0
 
-    for i, (ref, url) in enumerate(rows, 1):
-        try:
-            html = fetch_html(url)
-            soup = BeautifulSoup(html, "html.parser")
-            kv = extract_kv_pairs(soup)
-
-            decision = pick_field(kv, "decision")
-            decision_type = pick_field(kv, "decision_type")
-            decision_date = pick_field(kv, "decision_date")
-            status = pick_field(kv, "status")
-
-            cur.execute("""
-                UPDATE applications
-                SET decision = COALESCE(?, decision),
-                    decision_type = COALESCE(?, decision_type),
-                    decision_date = COALESCE(?, decision_date),
-                    status = COALESCE(?, status)
-                WHERE application_ref = ?
-            """, (decision, decision_type, decision_date, status, ref))
-            con.commit()
-            updated += 1
-
-            if i % 10 == 0:
-                print(f"{i}/{len(rows)} enriched...")
-
-            time.sleep(args.sleep)
-
-        except Exception as e:
-            failed += 1
-            print(f"[FAIL] {ref} {url} -> {e}")
-
-    con.close()
+    # Fan fetch+parse out across threads (network wait dominates); funnel
+    # all UPDATEs through one writer thread batching executemany per 100.
+    limiter = RateLimiter(args.sleep)
+    results: queue.Queue = queue.Queue(maxsize=1000)
+    writer = threading.Thread(target=writer_loop, args=(args.db, results))
+    writer.start()
+
+    try:
+        with ThreadPoolExecutor(max_workers=args.workers) as ex:
+            # Stream the cursor: first fetches start while SQLite is still
+            # producing rows, and the full result set never sits in RAM.
+            futures = {
+                ex.submit(enrich_one, row[0], row[1], row[2:], limiter): (row[0], row[1])
+                for row in cur.execute(q, params)
+            }
+            con.close()
+            total = len(futures)
+            print(f"Found {total} rows to enrich")
+            for i, fut in enumerate(as_completed(futures), 1):
+                ref, url = futures[fut]
+                try:
+                    res = fut.result()
+                    if res is None:
+                        unchanged += 1
+                    else:
+                        results.put(res)
+                        updated += 1
+                except Exception as e:
+                    failed += 1
+                    print(f"[FAIL] {ref} {url} -> {e}")
+                if i % 10 == 0:
+                    print(f"{i}/{total} enriched...")
+    finally:
+        results.put(None)
+        writer.join()
     print("\nDONE")
     print("updated:", updated)
+    print("unchanged:", unchanged)
     print("failed:", failed)
     print("Next: rebuild index -> python scripts/03_build_similarity_index.py")
 
@@ -0,0 +1,55 @@
+"""Shared SQLite connection setup for the scripts/ tools.
+
+Every script used to open the DB in default rollback-journal mode with
+synchronous=FULL, which costs two disk flushes per commit. db_open()
+centralizes the fast-path pragmas: WAL journaling, synchronous=NORMAL,
+in-memory temp tables, a 64 MB page cache and a 256 MB mmap window.
+"""
+import sqlite3
+
+
+def db_open(path) -> sqlite3.Connection:
+    # default isolation level: sqlite3 auto-begins a transaction before
+    # DML, so an executemany batch + commit() is one transaction. With
+    # isolation_level=None every statement would autocommit and the
+    # batched writers' commit() calls would be no-ops.
+    con = sqlite3.connect(str(path))
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("PRAGMA synchronous=NORMAL")
+    con.execute("PRAGMA temp_store=MEMORY")
+    con.execute("PRAGMA cache_size=-65536")
+    con.execute("PRAGMA mmap_size=268435456")
+    return con
+
+
+# Shared between the enrichers' SELECTs and the partial index below —
+# the predicate must match textually for the planner to use the index.
+MISSING_WHERE = "decision IS NULL OR decision = '' OR date_decided IS NULL OR date_decided = ''"
+
+
+def ensure_enrich_columns(conn):
+    """One-time migration used by the detail-page enrichers: surface
+    details_url and week_start as virtual generated columns and index
+    the enrich filter, replacing the LIKE + json_extract full scan.
+
+    The json_valid guards matter: the weekly-archive ingest stores raw
+    HTML in the same raw_json column, and an unguarded json_extract
+    would abort the index build on the first such row.
+    """
+    for ddl in (
+        "ALTER TABLE applications ADD COLUMN details_url TEXT "
+        "GENERATED ALWAYS AS (CASE WHEN json_valid(raw_json) "
+        "THEN json_extract(raw_json, '$.details_url') END) VIRTUAL",
+        "ALTER TABLE applications ADD COLUMN week_start_date TEXT "
+        "GENERATED ALWAYS AS (CASE WHEN json_valid(raw_json) "
+        "THEN substr(json_extract(raw_json, '$.week_start'), 1, 10) END) VIRTUAL",
+    ):
+        try:
+            conn.execute(ddl)
+        except sqlite3.OperationalError:
+            pass  # column already exists
+    conn.execute(
+        f"CREATE INDEX IF NOT EXISTS idx_enrich "
+        f"ON applications(council, week_start_date, decision) "
+        f"WHERE {MISSING_WHERE}"
+    )
@@ -0,0 +1,43 @@
+"""Shared HTTP session setup for the portal scripts.
+
+Every script that talks to the portal wants the same thing: keep-alive
+connection pooling, retries with backoff on transient failures, and the
+usual headers. make_session() builds that once so the scripts stop
+re-growing their own slightly different copies.
+"""
+import requests
+from requests.adapters import HTTPAdapter, Retry
+
+UA = "Mozilla/5.0 (Macintosh; Intel Mac OS X) planning-bot/1.0"
+
+
+def make_session(ua: str = UA) -> requests.Session:
+    sess = requests.Session()
+    sess.headers.update({"User-Agent": ua, "Accept": "text/html,*/*"})
+    retry = Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=[429, 500, 502, 503, 504],
+    )
+    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=16, max_retries=retry)
+    sess.mount("https://", adapter)
+    sess.mount("http://", adapter)
+    return sess
+
+
+def fetch_bounded(sess: requests.Session, url: str, max_bytes: int = 512_000, **kwargs):
+    """GET url but stop reading the body after max_bytes.
+
+    Detail and weekly-list pages occasionally balloon (embedded document
+    lists, broken templates); everything we parse sits near the top, so
+    capping the read bounds both transfer and parse time. Returns
+    (response, text) — the response is already closed, but status_code,
+    url and headers remain usable.
+    """
+    kwargs.setdefault("timeout", 45)
+    with sess.get(url, stream=True, allow_redirects=True, **kwargs) as r:
+        raw = r.raw.read(max_bytes + 1, decode_content=True)
+        if len(raw) > max_bytes:
+            raw = raw[:max_bytes]
+        text = raw.decode(r.encoding or "utf-8", errors="replace")
+    return r, text
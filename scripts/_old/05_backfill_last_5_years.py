@@ -4,6 +4,10 @@ from datetime import datetime, timezone, timedelta
 from dotenv import load_dotenv
 from playwright.sync_api import sync_playwright, TimeoutError as PWTimeoutError
 
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from _db import db_open
+
 load_dotenv()
 DB_PATH = os.getenv("DB_PATH", "./db/newcastle_planning.sqlite")
 UA = os.getenv("USER_AGENT", "PlanaAI-Pilot/0.1")
@@ -14,46 +18,36 @@ if not BASE_WEEKLY_URL:
 
 PORTAL_BASE = "https://portal.newcastle.gov.uk"
 
-def upsert(ref, url, source):
+def upsert_many(con, items, source):
+    # One executemany + commit per week instead of a connect/fsync per row.
     now = datetime.now(timezone.utc).isoformat()
-    con = sqlite3.connect(DB_PATH)
-    cur = con.cursor()
-    cur.execute("""
+    con.executemany("""
     INSERT INTO applications(application_ref,url,source,last_seen_utc)
     VALUES(?,?,?,?)
     ON CONFLICT(application_ref) DO UPDATE SET
         url=COALESCE(excluded.url, applications.url),
         source=excluded.source,
         last_seen_utc=excluded.last_seen_utc
-    """, (ref, url, source, now))
+    """, [(ref, url, source, now) for ref, url in items])
     con.commit()
-    con.close()
-
-def extract_from_table(page):
-    rows = page.query_selector_all("table tr")
-    items = []
-    for r in rows:
-        cells = r.query_selector_all("td")
-        if len(cells) < 2:
-            continue
-        text_cells = [c.inner_text().strip() for c in cells]
-        joined = " | ".join(text_cells)
 
-        m = re.search(r"\b\d{4}[/\-]\d+\b|\b[A-Z]{1,6}\d{2,}\b", joined)
-        if not m:
-            continue
-        ref = m.group(0)
+# Runs once in the browser and returns every (ref, href) pair: the old
+# per-row query_selector/inner_text loop paid an IPC roundtrip per cell.
+# a.href comes back already resolved to an absolute URL.
+ROWS_JS = r"""
+(trs) => trs.map(tr => {
+  const tds = [...tr.querySelectorAll('td')].map(c => c.innerText.trim());
+  if (tds.length < 2) return null;
+  const txt = tds.join(' | ');
+  const m = txt.match(/\b\d{4}[\/\-]\d+\b|\b[A-Z]{1,6}\d{2,}\b/);
+  if (!m) return null;
+  const a = tr.querySelector('a');
+  return [m[0], a ? a.href : null];
+}).filter(Boolean)
+"""
 
-        a = r.query_selector("a")
-        href = None
-        if a:
-            href = a.get_attribute("href")
-            if href and href.startswith("/"):
-                href = PORTAL_BASE + href
-            elif href and href.startswith("index.html"):
-                href = PORTAL_BASE + "/planning/" + href
-
-        items.append((ref, href))
+def extract_from_table(page):
+    items = page.eval_on_selector_all("table tr", ROWS_JS)
 
     # dedupe
     out, seen = [], set()
@@ -149,6 +143,8 @@ def main():
     total_rows_seen = 0
     total_weeks_skipped = 0
 
+    con = db_open(DB_PATH)
+
     with sync_playwright() as p:
         browser = p.chromium.launch(headless=True)
         context = browser.new_context(user_agent=UA)
@@ -194,8 +190,7 @@ def main():
             print(f"  rows_seen={len(items)}")
             total_rows_seen += len(items)
 
-            for ref, url in items:
-                upsert(ref, url, source=f"weekly_backfill_{week_start}_{week_end}")
+            upsert_many(con, items, source=f"weekly_backfill_{week_start}_{week_end}")
 
             weeks_done += 1
 
@@ -206,6 +201,8 @@ def main():
 
         browser.close()
 
+    con.close()
+
     print("\nDONE")
     print(f"weeks_done={weeks_done}  weeks_skipped={total_weeks_skipped}  rows_seen_total={total_rows_seen}")
     print("Now rebuild index:")
@@ -5,9 +5,14 @@ import datetime as dt
 from dataclasses import dataclass
 from typing import List, Tuple, Optional
 
+import lxml.html
 from playwright.sync_api import sync_playwright
 from dotenv import load_dotenv
 
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from _db import db_open
+
 load_dotenv(dotenv_path="./.env")
 
 DB_PATH = os.getenv("DB_PATH", "./db/newcastle_planning.sqlite")
@@ -16,6 +21,7 @@ SEARCH_URL = "https://portal.newcastle.gov.uk/planning/index.html?fa=search"
 APP_URL_FMT = "https://portal.newcastle.gov.uk/planning/index.html?fa=getApplication&id={idv}"
 
 REF_RE = re.compile(r"\b(19|20)\d{2}/\d{1,6}\b")
+ID_RE = re.compile(r"[?&]id=(\d+)")
 
 @dataclass
 class Row:
@@ -25,7 +31,7 @@ class Row:
 
 def db_connect():
     os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
-    con = sqlite3.connect(DB_PATH)
+    con = db_open(DB_PATH)
     cur = con.cursor()
     cur.execute("""
     CREATE TABLE IF NOT EXISTS applications (
@@ -57,25 +63,26 @@ def parse_results(page) -> List[Row]:
     """
     rows: List[Row] = []
 
-    # Grab ALL links on page that look like getApplication&id=...
-    links = page.locator("a[href*='fa=getApplication'][href*='id=']")
-    n = links.count()
-    for i in range(n):
-        href = links.nth(i).get_attribute("href") or ""
-        m = re.search(r"[?&]id=(\d+)", href)
+    # One IPC roundtrip for the whole document; link and ancestor-row
+    # walking happens in-process via lxml instead of a Playwright call
+    # per link (10k+ roundtrips over a full pagination run).
+    tree = lxml.html.fromstring(page.content())
+    for a in tree.xpath("//a[contains(@href,'fa=getApplication') and contains(@href,'id=')]"):
+        href = a.get("href") or ""
+        m = ID_RE.search(href)
         if not m:
             continue
         idv = m.group(1)
 
         # Try to find ref text in the same row area
         # (results are usually in a table, so walk up to nearest <tr>)
-        el = links.nth(i)
-        tr = el.locator("xpath=ancestor::tr[1]")
-        blob = (tr.inner_text() if tr.count() else el.inner_text()) or ""
+        trs = a.xpath("ancestor::tr[1]")
+        blob = (trs[0].text_content() if trs else a.text_content()) or ""
         refm = REF_RE.search(blob)
         if not refm:
             # Sometimes ref appears near link text itself
-            blob2 = (el.inner_text() or "") + " " + (el.locator("xpath=..").inner_text() or "")
+            parent = a.getparent()
+            blob2 = (a.text_content() or "") + " " + (parent.text_content() if parent is not None else "")
             refm = REF_RE.search(blob2)
         if not refm:
             continue
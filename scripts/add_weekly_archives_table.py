@@ -1,6 +1,11 @@
 import sqlite3
 from pathlib import Path
 
+try:
+    from scripts._db import db_open
+except ImportError:
+    from _db import db_open
+
 DB_PATH = Path("data/processed/planning.db")
 
 SQL = """
@@ -21,7 +26,7 @@ def main():
     if not DB_PATH.exists():
         raise SystemExit(f"❌ DB not found: {DB_PATH}")
 
-    conn = sqlite3.connect(DB_PATH)
+    conn = db_open(DB_PATH)
     try:
         conn.executescript(SQL)
         conn.commit()
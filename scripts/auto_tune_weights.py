@@ -1,20 +1,19 @@
 #!/usr/bin/env python3
 import argparse
 import json
+import re
 from datetime import datetime
 from pathlib import Path
 
+# expects: 'Quality score (heuristic): 49/100'
+SCORE_RE = re.compile(r"Quality score\s*\(heuristic\)\s*:\s*(\d+)\s*/\s*100", re.I)
+
 def clamp(x, lo, hi):
     return max(lo, min(hi, x))
 
 def parse_quality_score(text: str):
-    # expects: 'Quality score (heuristic): 49/100'
-    import re
-    for line in text.splitlines():
-        m = re.search(r"Quality score\s*\(heuristic\)\s*:\s*(\d+)\s*/\s*100", line, re.I)
-        if m:
-            return int(m.group(1))
-    return None
+    m = SCORE_RE.search(text)
+    return int(m.group(1)) if m else None
 
 def main():
     ap = argparse.ArgumentParser()
@@ -1,9 +1,20 @@
 import requests
-from bs4 import BeautifulSoup
+
+# selectolax (C, modest-based) is a few times faster than lxml for cheap
+# structural queries like these; fall back to bs4+lxml when absent.
+try:
+    from selectolax.parser import HTMLParser
+except ImportError:
+    HTMLParser = None
+    from bs4 import BeautifulSoup
 
 UA = "Mozilla/5.0 (Macintosh; Intel Mac OS X) planning-bot/1.0"
 BASE = "https://portal.newcastle.gov.uk/planning/index.html"
 
+# module-level session so all test URLs share one keep-alive connection
+SESSION = requests.Session()
+SESSION.headers.update({"User-Agent": UA, "Accept": "text/html,*/*"})
+
 TEST_URLS = [
     BASE + "?fa=getDecidedWeeklyList&week=05%2F11%2F2023",
     BASE + "?fa=getDecidedWeeklyList&week=04%2F02%2F2024",
@@ -11,20 +22,25 @@ TEST_URLS = [
 ]
 
 def summarize(url: str):
-    s = requests.Session()
-    s.headers.update({"User-Agent": UA, "Accept": "text/html,*/*"})
-    r = s.get(url, timeout=45, allow_redirects=True)
-
-    soup = BeautifulSoup(r.text, "lxml")
-    title = (soup.title.get_text(" ", strip=True) if soup.title else "NO TITLE")
+    r = SESSION.get(url, timeout=45, allow_redirects=True)
+
+    if HTMLParser is not None:
+        tree = HTMLParser(r.text)
+        t = tree.css_first("title")
+        title = " ".join(t.text().split()) if t else "NO TITLE"
+        body_text = " ".join(tree.text(separator=" ").split())
+        tables = len(tree.css("table"))
+        links = len(tree.css("a"))
+    else:
+        soup = BeautifulSoup(r.text, "lxml")
+        title = (soup.title.get_text(" ", strip=True) if soup.title else "NO TITLE")
+        body_text = " ".join(soup.get_text(" ", strip=True).split())
+        tables = len(soup.find_all("table"))
+        links = len(soup.find_all("a"))
 
     # first non-empty text snippet
-    body_text = " ".join(soup.get_text(" ", strip=True).split())
     snippet = body_text[:220]
 
-    tables = len(soup.find_all("table"))
-    links = len(soup.find_all("a"))
-
     print("\n==============================")
     print("URL:", url)
     print("STATUS:", r.status_code)
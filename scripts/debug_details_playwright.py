@@ -1,6 +1,9 @@
-import time
 from pathlib import Path
-from playwright.sync_api import sync_playwright
+
+try:
+    from scripts.shared_browser import get_context, shutdown
+except ImportError:
+    from shared_browser import get_context, shutdown
 
 URL = "https://portal.newcastle.gov.uk/planning/index.html?fa=getApplication&id=129834"
 
@@ -9,17 +12,20 @@ OUT_PNG = Path("data/raw/debug_details_playwright.png")
 OUT_HTML.parent.mkdir(parents=True, exist_ok=True)
 
 def main():
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        ctx = browser.new_context()
+    ctx = get_context()
+    try:
         page = ctx.new_page()
 
-        # Warm-up to get cookies/tokens
-        page.goto("https://portal.newcastle.gov.uk/planning/index.html?fa=getReceivedWeeklyList", wait_until="networkidle", timeout=60000)
-        time.sleep(1.5)
+        # Warm-up to get cookies/tokens — domcontentloaded is enough, we
+        # don't need the page to go idle
+        page.goto("https://portal.newcastle.gov.uk/planning/index.html?fa=getReceivedWeeklyList", wait_until="domcontentloaded", timeout=60000)
 
-        page.goto(URL, wait_until="networkidle", timeout=60000)
-        time.sleep(2.0)
+        page.goto(URL, wait_until="domcontentloaded", timeout=60000)
+        # proceed as soon as the detail content appears instead of sleeping
+        try:
+            page.wait_for_selector("table, #content, .applicationDetails", timeout=15000)
+        except Exception:
+            pass
 
         html = page.content()
         OUT_HTML.write_text(html, encoding="utf-8")
@@ -33,8 +39,8 @@ def main():
         print("IFRAMES:", len(page.frames))
         for i, fr in enumerate(page.frames):
             print(f"FRAME[{i}] url:", fr.url[:120])
-
-        browser.close()
+    finally:
+        shutdown()
 
 if __name__ == "__main__":
     main()
@@ -18,8 +18,19 @@ def main():
 
         page.goto(URL, timeout=60000)
 
-        # give JS time to populate fields
-        page.wait_for_timeout(8000)
+        # wait for the detail content itself rather than a flat 8s: wakes
+        # up as soon as the JS has populated the page
+        try:
+            page.wait_for_function(
+                "document.querySelectorAll('table').length > 0 && document.body.innerText.includes('Proposal')",
+                timeout=15000,
+            )
+        except Exception:
+            # backstop for layouts the predicate doesn't match
+            try:
+                page.wait_for_load_state("networkidle", timeout=5000)
+            except Exception:
+                pass
 
         html = page.content()
         OUT_HTML.write_text(html, encoding="utf-8")
@@ -10,10 +10,8 @@ tests = [
     ("RECENT", {"fa": "getDeterminedWeeklyList", "week": "06/07/2025"}),
 ]
 
-def go(label, params):
-    s = requests.Session()
-    s.headers.update({"User-Agent": UA, "Accept": "text/html,*/*", "Referer": BASE})
-    r = s.get(BASE, params=params, timeout=45, allow_redirects=True)
+def go(sess, label, params):
+    r = sess.get(BASE, params=params, timeout=45, allow_redirects=True)
     print("\n==", label, "==")
     print("status:", r.status_code)
     print("final:", r.url)
@@ -22,8 +20,14 @@ def go(label, params):
     print("first80:", " ".join((r.text or "")[:200].split()))
 
 def main():
-    for label, params in tests:
-        go(label, params)
+    # one session for all probes — keep-alive skips a TLS handshake per test
+    s = requests.Session()
+    s.headers.update({"User-Agent": UA, "Accept": "text/html,*/*", "Referer": BASE})
+    try:
+        for label, params in tests:
+            go(s, label, params)
+    finally:
+        s.close()
 
 if __name__ == "__main__":
     main()
@@ -29,8 +29,7 @@ def make_session():
     s.mount("http://", adapter)
     return s
 
-def go(label, params):
-    s = make_session()
+def go(s, label, params):
     print("\n==", label, "==")
     try:
         r = s.get(BASE, params=params, timeout=45, allow_redirects=True)
@@ -45,13 +44,17 @@ def go(label, params):
         print("SSL ERROR:", repr(e))
     except requests.exceptions.RequestException as e:
         print("REQUEST ERROR:", repr(e))
-    finally:
-        s.close()
 
 def main():
-    for label, params in tests:
-        go(label, params)
-        time.sleep(1.2)
+    # build the session (and its retry/pool adapter) once so all probes
+    # reuse the keep-alive connection
+    s = make_session()
+    try:
+        for label, params in tests:
+            go(s, label, params)
+            time.sleep(1.2)
+    finally:
+        s.close()
 
 if __name__ == "__main__":
     main()
@@ -1,8 +1,11 @@
 from pathlib import Path
-import requests
-from bs4 import BeautifulSoup
+from lxml import html as lxml_html
+
+try:
+    from scripts._http import make_session
+except ImportError:
+    from _http import make_session
 
-UA = "Mozilla/5.0 (Macintosh; Intel Mac OS X) planning-bot/1.0"
 BASE = "https://portal.newcastle.gov.uk/planning/index.html"
 OUT = Path("data/raw/debug_determined_week.html")
 OUT.parent.mkdir(parents=True, exist_ok=True)
@@ -10,8 +13,8 @@ OUT.parent.mkdir(parents=True, exist_ok=True)
 WEEK = "12/11/2023"  # known week you already saw rows for
 
 def main():
-    s = requests.Session()
-    s.headers.update({"User-Agent": UA, "Accept": "text/html,*/*", "Referer": BASE})
+    s = make_session()
+    s.headers["Referer"] = BASE
 
     # warmup
     s.get(BASE, params={"fa": "getDeterminedWeeklyList"}, timeout=45, allow_redirects=True)
@@ -20,27 +23,29 @@ def main():
     print("STATUS:", r.status_code)
     print("FINAL:", r.url)
 
-    OUT.write_text(r.text, encoding="utf-8", errors="replace")
+    # write and parse the raw bytes — skips decode/re-encode of the whole
+    # body, and lxml handles the charset itself
+    OUT.write_bytes(r.content)
     print("SAVED:", OUT)
 
-    soup = BeautifulSoup(r.text, "lxml")
-    tables = soup.find_all("table")
+    root = lxml_html.fromstring(r.content)
+    tables = root.xpath("//table")
     print("TABLES:", len(tables))
     if not tables:
         raise SystemExit("❌ No tables found")
 
     t = tables[0]
-    headers = [th.get_text(" ", strip=True) for th in t.select("th")]
+    headers = [" ".join(th.text_content().split()) for th in t.xpath(".//th")]
     print("\nHEADERS:")
     for h in headers:
         print(" -", h)
 
-    first_row = t.select_one("tr + tr")
-    if not first_row:
+    rows = t.xpath(".//tr")
+    if len(rows) < 2:
         print("\n(No data rows)")
         return
 
-    cells = [td.get_text(" ", strip=True) for td in first_row.select("td")]
+    cells = [" ".join(td.text_content().split()) for td in rows[1].xpath("./td")]
     print("\nFIRST ROW CELLS:")
     for i, c in enumerate(cells):
         print(f"{i:02d}:", c[:140])
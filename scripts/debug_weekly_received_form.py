@@ -1,56 +1,56 @@
 import sys
-import requests
-from bs4 import BeautifulSoup
+from lxml import html as lxml_html
 from urllib.parse import urljoin
 
+try:
+    from scripts._http import make_session, fetch_bounded
+except ImportError:
+    from _http import make_session, fetch_bounded
+
 BASE = "https://portal.newcastle.gov.uk/planning/"
 URL = urljoin(BASE, "index.html")
 
-HEADERS = {
-    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X) planning-bot/1.0",
-    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-    "Referer": URL,
-}
+SESSION = make_session()
+SESSION.headers["Referer"] = URL
 
 def dump(html: str):
-    soup = BeautifulSoup(html, "lxml")
+    root = lxml_html.fromstring(html)
 
-    title = soup.title.get_text(" ", strip=True) if soup.title else "(no title)"
+    titles = root.xpath("//title")
+    title = " ".join(titles[0].text_content().split()) if titles else "(no title)"
     print("TITLE:", title)
 
     print("\n--- FORM FIELDS (select) ---")
-    for s in soup.find_all("select"):
+    for s in root.xpath("//select[@name]"):
         name = s.get("name")
-        if not name:
-            continue
-        opts = [o.get("value") or o.get_text(strip=True) for o in s.find_all("option")][:5]
+        opts = [o.get("value") or o.text_content().strip() for o in s.xpath(".//option")][:5]
         print(f"select name={name!r} sample_options={opts}")
 
     print("\n--- FORM FIELDS (input) ---")
-    for i in soup.find_all("input"):
+    for i in root.xpath("//input[@name]"):
         name = i.get("name")
-        if not name:
-            continue
         itype = i.get("type") or ""
         val = i.get("value") or ""
         print(f"input name={name!r} type={itype!r} value={val!r}")
 
     # Try to detect if a results table exists
-    tables = soup.find_all("table")
+    tables = root.xpath("//table")
     print("\nTABLE COUNT:", len(tables))
     if tables:
         # Print first table headers
-        ths = [th.get_text(" ", strip=True) for th in tables[0].find_all("th")]
+        ths = [" ".join(th.text_content().split()) for th in tables[0].xpath(".//th")]
         print("FIRST TABLE HEADERS:", ths)
 
 def fetch(params: dict):
-    r = requests.get(URL, params=params, headers=HEADERS, timeout=45, allow_redirects=True)
+    # bound the download itself, not just the parsed slice — forms and
+    # first results fit well within 200KB
+    r, text = fetch_bounded(SESSION, URL, max_bytes=200_000, params=params)
     print("\n=============================")
     print("REQUEST PARAMS:", params)
     print("STATUS:", r.status_code)
     print("FINAL URL:", r.url)
     print("=============================")
-    dump(r.text[:200000])  # enough to include forms and first results
+    dump(text)
 
 def main():
     # 1) base weekly received page
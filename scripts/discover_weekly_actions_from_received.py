@@ -1,25 +1,35 @@
 import re
-import requests
-from bs4 import BeautifulSoup
 
-UA = "Mozilla/5.0 (Macintosh; Intel Mac OS X) planning-bot/1.0"
+try:
+    from scripts._http import make_session
+except ImportError:
+    from _http import make_session
+
 URL = "https://portal.newcastle.gov.uk/planning/index.html?fa=getReceivedWeeklyList"
 
+# Everything this script reports is string-level (link text/hrefs, fa=
+# actions, 'Decid' fragments), so regexes over the raw bytes do the job
+# without building an HTML tree or decoding the body.
+_TITLE_RE = re.compile(rb"<title[^>]*>(.*?)</title>", re.I | re.S)
+_LINK_RE = re.compile(rb'<a[^>]+href="([^"]+)"[^>]*>([^<]*)</a>', re.I)
+_FA_RE = re.compile(rb"fa=([A-Za-z0-9_]+)")
+_DECID_RE = re.compile(rb"[A-Za-z0-9_]*Decid[A-Za-z0-9_]*")
+
+def _txt(b: bytes) -> str:
+    return " ".join(b.decode("utf-8", "replace").split())
+
 def main():
-    s = requests.Session()
-    s.headers.update({"User-Agent": UA, "Accept": "text/html,*/*"})
+    s = make_session()
     r = s.get(URL, timeout=45, allow_redirects=True)
+    body = r.content
 
-    soup = BeautifulSoup(r.text, "lxml")
-    title = soup.title.get_text(" ", strip=True) if soup.title else "NO TITLE"
+    m = _TITLE_RE.search(body)
+    title = _txt(m.group(1)) if m else "NO TITLE"
     print("STATUS:", r.status_code)
     print("FINAL:", r.url)
     print("TITLE:", title)
 
-    hrefs = []
-    for a in soup.find_all("a", href=True):
-        txt = a.get_text(" ", strip=True)
-        hrefs.append((txt, a["href"]))
+    hrefs = [(_txt(txt), _txt(href)) for href, txt in _LINK_RE.findall(body)]
 
     print("\nLinks containing 'decid' or 'decision':")
     any_links = False
@@ -31,13 +41,12 @@ def main():
     if not any_links:
         print(" (none found)")
 
-    html = r.text
-    fas = sorted(set(re.findall(r"fa=([A-Za-z0-9_]+)", html)))
+    fas = sorted({_txt(x) for x in _FA_RE.findall(body)})
     print("\nAll fa= actions found in page HTML:")
     for x in fas:
         print(" -", x)
 
-    decided_strings = sorted(set(re.findall(r"[A-Za-z0-9_]*Decid[A-Za-z0-9_]*", html)))
+    decided_strings = sorted({_txt(x) for x in _DECID_RE.findall(body)})
     print("\nStrings containing 'Decid' in HTML:")
     if decided_strings:
         for x in decided_strings[:200]:
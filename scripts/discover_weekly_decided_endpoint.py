@@ -1,13 +1,18 @@
 import argparse
 import datetime as dt
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlencode
 
 import requests
-from bs4 import BeautifulSoup
+from lxml import html as lxml_html
+
+try:
+    from scripts._http import make_session
+except ImportError:
+    from _http import make_session
 
 BASE = "https://portal.newcastle.gov.uk/planning/index.html"
-UA = "Mozilla/5.0 (Macintosh; Intel Mac OS X) planning-bot/1.0"
 
 CANDIDATES = [
     # Common Idox patterns
@@ -40,21 +45,18 @@ def fetch(sess: requests.Session, method: str, params: dict) -> requests.Respons
         return sess.get(BASE, params=params, timeout=45, allow_redirects=True)
     raise ValueError("unsupported method")
 
-def table_headers(html: str):
-    soup = BeautifulSoup(html, "lxml")
-    table = soup.find("table")
-    if not table:
-        return []
-    ths = table.find_all("th")
-    return [th.get_text(" ", strip=True) for th in ths]
-
-def count_app_links(html: str) -> int:
-    soup = BeautifulSoup(html, "lxml")
-    table = soup.find("table")
-    if not table:
-        return 0
+# Straight lxml XPath: header/link extraction doesn't need BeautifulSoup's
+# Python-level tree wrapping, which dominates parse time here. One parse per
+# response yields both headers and the application-link count.
+def analyze(html: str):
+    root = lxml_html.fromstring(html)
+    first = root.xpath("(//table)[1]")
+    if not first:
+        return [], 0
+    headers = [" ".join(th.text_content().split()) for th in first[0].xpath(".//th")]
     # weekly lists contain "Jump to Application" links or app refs; count links that look like application navigation
-    return len(table.find_all("a"))
+    links = len(first[0].xpath(".//a"))
+    return headers, links
 
 def looks_like_weekly_list(headers):
     if not headers:
@@ -72,34 +74,52 @@ def main():
     ap.add_argument("--show-html", action="store_true")
     args = ap.parse_args()
 
-    sess = requests.Session()
-    sess.headers.update({"User-Agent": UA, "Accept": "text/html,*/*"})
+    sess = make_session()
 
     weeks = pick_sample_weeks()
     print("Testing weeks:", ", ".join(w.isoformat() for w in weeks))
     print("Base:", BASE)
     print()
 
-    best = None
-
-    for method, template in CANDIDATES:
-        ok_hits = 0
-        decision_hits = 0
-
-        for w in weeks:
+    # Build the full candidate x week sweep up front and run the fetches on
+    # a thread pool (pure I/O wait); scoring/printing below stays serial and
+    # in the original order by indexing back into the results.
+    tasks = []
+    for ci, (method, template) in enumerate(CANDIDATES):
+        for wi, w in enumerate(weeks):
             params = dict(template)
             for k in list(params.keys()):
                 if params[k] is None:
                     params[k] = fmt_week(w)
+            tasks.append((ci, wi, method, params))
+
+    results = {}
+
+    def run_task(task):
+        ci, wi, method, params = task
+        try:
+            r = fetch(sess, method, params)
+            return (ci, wi, params, r, None)
+        except Exception as e:
+            return (ci, wi, params, None, e)
+
+    with ThreadPoolExecutor(max_workers=8) as ex:
+        for ci, wi, params, r, err in ex.map(run_task, tasks):
+            results[(ci, wi)] = (params, r, err)
+
+    best = None
+
+    for ci, (method, template) in enumerate(CANDIDATES):
+        ok_hits = 0
+        decision_hits = 0
 
-            try:
-                r = fetch(sess, method, params)
-            except Exception as e:
-                print(f"[FAIL] {method} {template} -> {e}")
+        for wi, w in enumerate(weeks):
+            params, r, err = results[(ci, wi)]
+            if err is not None:
+                print(f"[FAIL] {method} {template} -> {err}")
                 continue
 
-            hdrs = table_headers(r.text)
-            links = count_app_links(r.text)
+            hdrs, links = analyze(r.text)
 
             is_weekly = looks_like_weekly_list(hdrs)
             has_dec = has_decision_column(hdrs)
@@ -0,0 +1,14 @@
+"""Process-wide SentenceTransformer cache.
+
+Constructing the model costs ~1-2s of Torch init + weight load, which
+dominates latency when a caller only needs a single 1-row encode. Scripts
+(and the API importing them) share one instance per model name instead of
+rebuilding it on every call.
+"""
+from functools import lru_cache
+
+
+@lru_cache(maxsize=2)
+def get_model(model_name: str = "all-MiniLM-L6-v2"):
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name)
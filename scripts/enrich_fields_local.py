@@ -1,59 +1,81 @@
-import argparse
 import re
 import sqlite3
 from pathlib import Path
 
+try:
+    from scripts._db import db_open
+except ImportError:
+    from _db import db_open
+
 DB_PATH = Path("data/processed/planning.db")
 COUNCIL = "Newcastle City Council"
 
 WS_RE = re.compile(r"\s+")
-PUNCT_RE = re.compile(r"[ \t]+")
 HTML_ENT_RE = re.compile(r"&[a-zA-Z]+;")
 
-def clean_text(s: str) -> str:
-    s = (s or "").strip()
-    s = s.replace("\u00ad", "")  # soft hyphen
-    s = s.replace("\u200b", "")  # zero width space
-    s = HTML_ENT_RE.sub(" ", s)
-    s = WS_RE.sub(" ", s)
-    return s.strip()
+def collapse_ws(s: str) -> str:
+    return WS_RE.sub(" ", s or "").strip()
 
-def main():
-    ap = argparse.ArgumentParser()
-    ap.add_argument("--limit", type=int, default=50000)
-    args = ap.parse_args()
+def strip_entities(s: str) -> str:
+    return HTML_ENT_RE.sub(" ", s or "")
 
+def main():
     if not DB_PATH.exists():
         raise SystemExit(f"❌ DB not found: {DB_PATH}")
 
-    conn = sqlite3.connect(DB_PATH)
+    # The cleanup runs as three set-based UPDATEs instead of pulling every
+    # proposal through Python. Each step's WHERE only touches rows that
+    # actually need it, so reruns are near-free; one commit covers all
+    # three steps.
+    conn = db_open(DB_PATH)
+    conn.create_function("collapse_ws", 1, collapse_ws)
+    conn.create_function("strip_entities", 1, strip_entities)
     try:
-        rows = conn.execute(
-            """
-            SELECT id, proposal
-            FROM applications
-            WHERE council = ?
-              AND proposal IS NOT NULL
-              AND proposal <> ''
-            LIMIT ?
+        base = "council = ? AND proposal IS NOT NULL AND proposal <> ''"
+
+        # 1) invisible characters + stray edge whitespace, pure SQL
+        cur = conn.execute(
+            f"""
+            UPDATE applications
+            SET proposal = TRIM(REPLACE(REPLACE(proposal, char(173), ''), char(8203), ''))
+            WHERE {base}
+              AND (proposal GLOB '*' || char(173) || '*'
+                   OR proposal GLOB '*' || char(8203) || '*'
+                   OR proposal <> TRIM(proposal))
+            """,
+            (COUNCIL,),
+        )
+        print("Invisible/edge-whitespace rows:", cur.rowcount)
+
+        # 2) HTML entities — only rows that can contain one
+        cur = conn.execute(
+            f"""
+            UPDATE applications
+            SET proposal = strip_entities(proposal)
+            WHERE {base} AND proposal GLOB '*&*;*'
+            """,
+            (COUNCIL,),
+        )
+        print("Entity rows:", cur.rowcount)
+
+        # 3) collapse runs of whitespace — only rows with a double space
+        #    or embedded tab/newline
+        cur = conn.execute(
+            f"""
+            UPDATE applications
+            SET proposal = collapse_ws(proposal)
+            WHERE {base}
+              AND (proposal GLOB '*  *'
+                   OR proposal GLOB '*' || char(9) || '*'
+                   OR proposal GLOB '*' || char(10) || '*'
+                   OR proposal GLOB '*' || char(13) || '*')
             """,
-            (COUNCIL, args.limit),
-        ).fetchall()
-
-        updated = 0
-        for app_id, proposal in rows:
-            cleaned = clean_text(proposal)
-            if cleaned != proposal:
-                conn.execute(
-                    "UPDATE applications SET proposal = ? WHERE id = ?",
-                    (cleaned, app_id),
-                )
-                updated += 1
+            (COUNCIL,),
+        )
+        print("Whitespace-collapse rows:", cur.rowcount)
 
         conn.commit()
         print("✅ DONE")
-        print("Rows scanned:", len(rows))
-        print("Rows updated:", updated)
     finally:
         conn.close()
 
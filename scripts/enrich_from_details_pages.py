@@ -1,15 +1,22 @@
 import argparse
-import json
 import re
 import sqlite3
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
 from typing import Optional, Tuple
 
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from lxml import html as lxml_html
+
+try:
+    from scripts._http import fetch_bounded
+except ImportError:
+    from _http import fetch_bounded
 
 DB_PATH = Path("data/processed/planning.db")
 
@@ -22,9 +29,60 @@ HEADERS = {
 TIMEOUT = 45
 
 DATE_RE = re.compile(r"\b(\d{2}/\d{2}/\d{4})\b")
+_WS_RE = re.compile(r"\s+")
+
+UPDATE_SQL = """
+UPDATE applications
+SET
+  proposal = CASE WHEN proposal IS NULL OR proposal = '' THEN COALESCE(?, proposal) ELSE proposal END,
+  decision = COALESCE(?, decision),
+  decision_type = COALESCE(?, decision_type),
+  date_received = COALESCE(?, date_received),
+  date_decided = COALESCE(?, date_decided)
+WHERE id = ?
+"""
+
+def ensure_details_url_column(conn):
+    """One-time migration: expose raw_json's details_url as a virtual
+    generated column so the scan below can use an index instead of a
+    LIKE over every raw_json blob. The json_valid guard matters: the
+    weekly-archive ingest stores raw HTML in the same raw_json column,
+    and an unguarded json_extract would abort the index build on the
+    first such row."""
+    try:
+        conn.execute(
+            "ALTER TABLE applications ADD COLUMN details_url TEXT "
+            "GENERATED ALWAYS AS (CASE WHEN json_valid(raw_json) "
+            "THEN json_extract(raw_json, '$.details_url') END) VIRTUAL"
+        )
+    except sqlite3.OperationalError:
+        pass  # column already exists
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_app_details_url "
+        "ON applications(council, details_url) WHERE details_url IS NOT NULL"
+    )
+
+class RateLimiter:
+    """Spaces request starts evenly across all workers so the pool stays
+    as polite as the old serial sleep."""
+    def __init__(self, interval: float):
+        self.interval = max(interval, 0.0)
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
 
 def norm(s: str) -> str:
-    return " ".join((s or "").strip().split())
+    # one compiled-regex pass; this runs on every cell of every table row
+    return _WS_RE.sub(" ", s).strip() if s else ""
 
 def parse_date(s: str) -> Optional[str]:
     s = norm(s)
@@ -37,81 +95,90 @@ def parse_date(s: str) -> Optional[str]:
     except ValueError:
         return None
 
+# One compiled alternation instead of six serial substring tests; group
+# names double as the return values. The prior-approval phrases come
+# first so they win over the bare "approve" substring they contain.
+_DT_RE = re.compile(
+    r"(?P<prior_approval_not_required>prior approval not required)"
+    r"|(?P<prior_approval_required>prior approval required)"
+    r"|(?P<approved>approve|granted|permit)"
+    r"|(?P<refused>refus|rejected)"
+    r"|(?P<withdrawn>withdraw)"
+    r"|(?P<declined>declin)",
+    re.I,
+)
+
 def decision_type_from_decision(decision: Optional[str]) -> Optional[str]:
     if not decision:
         return None
-    d = decision.lower()
-    if "approve" in d or "granted" in d or "permit" in d:
-        return "approved"
-    if "refus" in d or "rejected" in d:
-        return "refused"
-    if "withdraw" in d:
-        return "withdrawn"
-    if "declin" in d:
-        return "declined"
-    if "prior approval not required" in d:
-        return "prior_approval_not_required"
-    if "prior approval required" in d:
-        return "prior_approval_required"
-    return None
+    m = _DT_RE.search(decision)
+    return m.lastgroup if m else None
+
+# Label dispatch for the key/value tables on Idox detail pages: first
+# matching regex wins per field, checked in order.
+LABELS = [
+    (re.compile(r"proposal|description"), "proposal"),
+    (re.compile(r"decision(?!.*type)"), "decision"),
+    (re.compile(r"received"), "date_received"),
+    (re.compile(r"decision issued|decision date|decided"), "date_decided"),
+]
 
 def extract_fields_from_details(html: str) -> Tuple[Optional[str], Optional[str], Optional[str], Optional[str]]:
     """
     Returns: (proposal, decision, date_received, date_decided)
     """
-    soup = BeautifulSoup(html, "lxml")
-
-    # Many Idox pages have key/value tables. We'll search for labels.
-    text_pairs = []
-    for tr in soup.find_all("tr"):
-        tds = tr.find_all(["th", "td"])
-        if len(tds) >= 2:
-            k = norm(tds[0].get_text(" ", strip=True))
-            v = norm(tds[1].get_text(" ", strip=True))
-            if k and v:
-                text_pairs.append((k.lower(), v))
-
-    proposal = None
-    decision = None
-    date_received = None
-    date_decided = None
-
-    for k, v in text_pairs:
-        if "proposal" in k or "description" in k:
-            if not proposal:
-                proposal = v
-        if "decision" in k and "type" not in k:
-            if not decision:
-                decision = v
-        if "received" in k:
-            if not date_received:
-                date_received = parse_date(v)
-        if "decision issued" in k or "decision date" in k or "decided" in k:
-            if not date_decided:
-                date_decided = parse_date(v)
-
-    return proposal, decision, date_received, date_decided
+    # One lxml tree walk with C-level text extraction, instead of a bs4
+    # find_all/get_text pass per row.
+    root = lxml_html.fromstring(html)
+    out = {}
+    for tr in root.xpath("//tr[count(th|td)>=2]"):
+        cells = tr.xpath("./th|./td")
+        k = norm(cells[0].text_content()).lower()
+        v = norm(cells[1].text_content())
+        if not k or not v:
+            continue
+        for rx, field in LABELS:
+            if field not in out and rx.search(k):
+                out[field] = v
+                break
+        if len(out) == len(LABELS):
+            break
+
+    return (
+        out.get("proposal"),
+        out.get("decision"),
+        parse_date(out.get("date_received", "")),
+        parse_date(out.get("date_decided", "")),
+    )
 
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--limit", type=int, default=300, help="How many applications to enrich this run")
     ap.add_argument("--sleep", type=float, default=0.6)
+    ap.add_argument("--workers", type=int, default=6)
     args = ap.parse_args()
 
     conn = sqlite3.connect(DB_PATH)
     conn.execute("PRAGMA journal_mode=WAL;")
+    # safe under WAL with periodic commits; avoids an fsync per commit
+    conn.execute("PRAGMA synchronous=NORMAL;")
 
     sess = requests.Session()
     sess.headers.update(HEADERS)
+    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=16)
+    sess.mount("https://", adapter)
+    sess.mount("http://", adapter)
 
     try:
+        ensure_details_url_column(conn)
+
         # Only enrich rows that have a details_url and are missing decision/date fields
         rows = conn.execute(
             """
-            SELECT id, application_ref, raw_json
+            SELECT id, application_ref, details_url
             FROM applications
             WHERE council = ?
-              AND raw_json LIKE '%"details_url"%'
+              AND details_url IS NOT NULL
               AND (decision IS NULL OR decision = '' OR date_decided IS NULL OR date_decided = '')
             ORDER BY id ASC
             LIMIT ?
@@ -126,47 +193,57 @@ def main():
         updated = 0
         failed = 0
 
-        for (app_id, app_ref, raw_json) in rows:
-            try:
-                meta = json.loads(raw_json) if raw_json else {}
-                url = meta.get("details_url")
-                if not url:
-                    continue
+        # Fetch on a thread pool (network wait dominates), rate-limited to
+        # the old serial pace; parsing and all DB writes stay on the main
+        # thread so sqlite sees a single writer.
+        limiter = RateLimiter(args.sleep)
+        tasks = [(app_id, app_ref, url) for (app_id, app_ref, url) in rows]
+
+        def fetch_one(app_id, app_ref, url):
+            limiter.wait()
+            r, text = fetch_bounded(sess, url, timeout=TIMEOUT)
+            return (app_id, app_ref, url, r.status_code, text)
+
+        # Batch UPDATEs: one executemany + commit per 50 extractions cuts
+        # an fsync per row down to one per batch.
+        pending = []
+
+        def flush_pending():
+            if not pending:
+                return
+            conn.executemany(UPDATE_SQL, pending)
+            conn.commit()
+            pending.clear()
+
+        with ThreadPoolExecutor(max_workers=args.workers) as ex:
+            futures = {ex.submit(fetch_one, *t): t for t in tasks}
+            for fut in as_completed(futures):
+                app_id, app_ref, url = futures[fut]
+                try:
+                    _, _, _, status, html = fut.result()
+                    if status != 200:
+                        failed += 1
+                        print(f"{app_ref} | HTTP {status} | {url}")
+                        continue
 
-                r = sess.get(url, timeout=TIMEOUT, allow_redirects=True)
-                if r.status_code != 200:
+                    proposal, decision, date_received, date_decided = extract_fields_from_details(html)
+
+                    # If proposal missing in DB but found on page, fill it.
+                    # Decision fields: fill if found.
+                    decision_type = decision_type_from_decision(decision)
+
+                    pending.append((proposal, decision, decision_type, date_received, date_decided, app_id))
+                    if len(pending) >= 50:
+                        flush_pending()
+                    updated += 1
+                    if updated % 25 == 0:
+                        print(f"Updated {updated}/{len(rows)} ...")
+
+                except Exception as e:
                     failed += 1
-                    print(f"{app_ref} | HTTP {r.status_code} | {url}")
-                    continue
-
-                proposal, decision, date_received, date_decided = extract_fields_from_details(r.text)
-
-                # If proposal missing in DB but found on page, fill it.
-                # Decision fields: fill if found.
-                decision_type = decision_type_from_decision(decision)
-
-                conn.execute(
-                    """
-                    UPDATE applications
-                    SET
-                      proposal = CASE WHEN proposal IS NULL OR proposal = '' THEN COALESCE(?, proposal) ELSE proposal END,
-                      decision = COALESCE(?, decision),
-                      decision_type = COALESCE(?, decision_type),
-                      date_received = COALESCE(?, date_received),
-                      date_decided = COALESCE(?, date_decided)
-                    WHERE id = ?
-                    """,
-                    (proposal, decision, decision_type, date_received, date_decided, app_id),
-                )
-                conn.commit()
-                updated += 1
-                if updated % 25 == 0:
-                    print(f"Updated {updated}/{len(rows)} ...")
-                time.sleep(args.sleep)
-
-            except Exception as e:
-                failed += 1
-                print(f"{app_ref} | ERROR | {e}")
+                    print(f"{app_ref} | ERROR | {e}")
+
+        flush_pending()
 
         print("\n✅ DONE")
         print("Rows attempted:", len(rows))
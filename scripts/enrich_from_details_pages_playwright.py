@@ -1,22 +1,53 @@
 import argparse
-import json
+import io
 import re
-import sqlite3
 import time
 from datetime import date, datetime
 from pathlib import Path
 from typing import Dict, Optional, Tuple
 
-from bs4 import BeautifulSoup
-from playwright.sync_api import sync_playwright, TimeoutError as PWTimeoutError
+import requests
+from lxml import etree
+from playwright.sync_api import sync_playwright
+
+try:
+    from scripts._db import db_open, ensure_enrich_columns, MISSING_WHERE
+except ImportError:
+    from _db import db_open, ensure_enrich_columns, MISSING_WHERE
 
 DB_PATH = Path("data/processed/planning.db")
 COUNCIL = "Newcastle City Council"
 
+WARMUP_URL = "https://portal.newcastle.gov.uk/planning/index.html?fa=getReceivedWeeklyList"
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X) planning-bot/1.0",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Referer": "https://portal.newcastle.gov.uk/planning/index.html",
+}
+
+TIMEOUT = 45
+
 DATE_RE = re.compile(r"\b(\d{2}/\d{2}/\d{4})\b")
+_WS_RE = re.compile(r"\s+")
+
+# commit one batch instead of fsyncing per row
+WRITE_BATCH = 100
+
+UPDATE_SQL = """
+UPDATE applications
+SET
+  proposal = CASE WHEN proposal IS NULL OR proposal = '' THEN COALESCE(?, proposal) ELSE proposal END,
+  decision = COALESCE(?, decision),
+  decision_type = COALESCE(?, decision_type),
+  date_received = COALESCE(?, date_received),
+  date_decided = COALESCE(?, date_decided)
+WHERE id = ?
+"""
 
 def norm(s: str) -> str:
-    return " ".join((s or "").strip().split())
+    # single compiled-regex pass; runs on every cell of every page
+    return _WS_RE.sub(" ", s).strip() if s else ""
 
 def parse_date_any(s: str) -> Optional[str]:
     s = norm(s)
@@ -29,55 +60,97 @@ def parse_date_any(s: str) -> Optional[str]:
     except ValueError:
         return None
 
+# One compiled alternation instead of six serial substring tests; group
+# names double as the return values. The prior-approval phrases come
+# first so they win over the bare "approve" substring they contain.
+_DT_RE = re.compile(
+    r"(?P<prior_approval_not_required>prior approval not required)"
+    r"|(?P<prior_approval_required>prior approval required)"
+    r"|(?P<approved>approve|granted|permit)"
+    r"|(?P<refused>refus|rejected)"
+    r"|(?P<withdrawn>withdraw)"
+    r"|(?P<declined>declin)",
+    re.I,
+)
+
 def decision_type_from_decision(decision: Optional[str]) -> Optional[str]:
     if not decision:
         return None
-    d = decision.lower()
-    if "approve" in d or "granted" in d or "permit" in d:
-        return "approved"
-    if "refus" in d or "rejected" in d:
-        return "refused"
-    if "withdraw" in d:
-        return "withdrawn"
-    if "declin" in d:
-        return "declined"
-    if "prior approval not required" in d:
-        return "prior_approval_not_required"
-    if "prior approval required" in d:
-        return "prior_approval_required"
-    return None
-
-def extract_pairs(soup: BeautifulSoup) -> Dict[str, str]:
+    m = _DT_RE.search(decision)
+    return m.lastgroup if m else None
+
+def _text(el) -> str:
+    return etree.tostring(el, method="text", encoding="unicode")
+
+def extract_pairs(html: str) -> Dict[str, str]:
+    # Streaming parse: end events per <tr>/<dl>, cleared once handled,
+    # so memory stays flat regardless of page size.
     pairs: Dict[str, str] = {}
 
-    for tr in soup.find_all("tr"):
-        cells = tr.find_all(["th", "td"])
-        if len(cells) >= 2:
-            k = norm(cells[0].get_text(" ", strip=True)).lower()
-            v = norm(cells[1].get_text(" ", strip=True))
-            if k and v:
-                pairs[k] = v
-
-    for dl in soup.find_all("dl"):
-        for dt_tag in dl.find_all("dt"):
-            dd_tag = dt_tag.find_next_sibling("dd")
-            if not dd_tag:
-                continue
-            k = norm(dt_tag.get_text(" ", strip=True)).lower()
-            v = norm(dd_tag.get_text(" ", strip=True))
-            if k and v:
-                pairs[k] = v
+    for _, elem in etree.iterparse(
+        io.BytesIO(html.encode("utf-8", "replace")),
+        html=True,
+        events=("end",),
+        tag=("tr", "dl"),
+    ):
+        if elem.tag == "tr":
+            cells = elem.xpath("./th|./td")
+            if len(cells) >= 2:
+                k = norm(_text(cells[0])).lower()
+                v = norm(_text(cells[1]))
+                if k and v:
+                    pairs[k] = v
+        else:  # dl
+            for dt_tag in elem.xpath("./dt"):
+                dd = dt_tag.xpath("following-sibling::dd[1]")
+                if not dd:
+                    continue
+                k = norm(_text(dt_tag)).lower()
+                v = norm(_text(dd[0]))
+                if k and v:
+                    pairs[k] = v
+        elem.clear(keep_tail=True)
 
     return pairs
 
+def waf_session(p) -> requests.Session:
+    """Solve the AWS WAF challenge once in a real browser, then hand its
+    cookies to a plain requests session. The detail pages themselves are
+    static HTML — Chromium is only needed for the challenge, so keeping
+    it out of the fetch loop cuts both latency and ~150MB of RSS."""
+    browser = p.chromium.launch(headless=True)
+    try:
+        context = browser.new_context()
+        page = context.new_page()
+        page.goto(WARMUP_URL, wait_until="domcontentloaded", timeout=60000)
+        time.sleep(2.0)
+        cookies = context.cookies()
+    finally:
+        browser.close()
+
+    sess = requests.Session()
+    sess.headers.update(HEADERS)
+    for c in cookies:
+        sess.cookies.set(c["name"], c["value"], domain=c.get("domain"), path=c.get("path", "/"))
+    return sess
+
+def is_waf_challenge(html: str) -> bool:
+    return "challenge.js" in html or "AwsWafIntegration" in html
+
 def extract_fields(html: str) -> Tuple[Optional[str], Optional[str], Optional[str], Optional[str]]:
-    soup = BeautifulSoup(html, "lxml")
-    pairs = extract_pairs(soup)
+    pairs = extract_pairs(html)
+
+    # Exact-label fast path first: most Idox pages use these keys
+    # verbatim, so we usually skip the whole-dict substring scan.
+    proposal = pairs.get("proposal") or pairs.get("description")
+    decision = pairs.get("decision")
+    date_received = parse_date_any(pairs.get("date received") or pairs.get("valid from") or "")
+    date_decided = parse_date_any(
+        pairs.get("decision issued") or pairs.get("decision date") or pairs.get("decided") or ""
+    )
 
-    proposal = None
-    decision = None
-    date_received = None
-    date_decided = None
+    if proposal and decision and date_received and date_decided:
+        return proposal, decision, date_received, date_decided
 
     for k, v in pairs.items():
         if proposal is None and ("proposal" in k or "description" in k):
@@ -107,19 +180,17 @@ def main():
 
     cutoff = (date.today().replace(year=date.today().year - args.recent_years)).isoformat()
 
-    conn = sqlite3.connect(DB_PATH)
-    conn.execute("PRAGMA journal_mode=WAL;")
+    conn = db_open(DB_PATH)
+    ensure_enrich_columns(conn)
 
     rows = conn.execute(
-        """
-        SELECT id, application_ref, raw_json
+        f"""
+        SELECT id, application_ref, details_url
         FROM applications
         WHERE council = ?
-          AND raw_json LIKE '%"details_url"%'
-          AND (decision IS NULL OR decision = '' OR date_decided IS NULL OR date_decided = '')
-          AND (
-               substr(json_extract(raw_json, '$.week_start'), 1, 10) >= ?
-          )
+          AND details_url IS NOT NULL
+          AND ({MISSING_WHERE})
+          AND week_start_date >= ?
         ORDER BY id ASC
         LIMIT ?
         """,
@@ -135,76 +206,71 @@ def main():
     updated = 0
     failed = 0
 
+    # Batch UPDATEs and commit per WRITE_BATCH rows instead of per row;
+    # the finally makes sure a partial batch still lands.
+    pending = []
+
+    def flush_pending():
+        if not pending:
+            return
+        conn.executemany(UPDATE_SQL, pending)
+        conn.commit()
+        pending.clear()
+
     with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context()
-        page = context.new_page()
+        # browser only for the WAF handshake; all page fetches go over
+        # plain HTTP with the exported cookies
+        sess = waf_session(p)
 
-        # Warm-up: visit weekly list once so WAF token/cookies get set
-        page.goto("https://portal.newcastle.gov.uk/planning/index.html?fa=getReceivedWeeklyList", wait_until="domcontentloaded", timeout=60000)
-        time.sleep(2.0)
+        try:
+            for (app_id, app_ref, url) in rows:
+                attempted += 1
+                try:
+                    r = sess.get(url, timeout=TIMEOUT, allow_redirects=True)
+                    html = r.text
 
-        for (app_id, app_ref, raw_json) in rows:
-            attempted += 1
-            try:
-                meta = json.loads(raw_json) if raw_json else {}
-                url = meta.get("details_url")
-                if not url:
-                    failed += 1
-                    continue
+                    if is_waf_challenge(html):
+                        # token expired — refresh cookies once and retry
+                        sess.close()
+                        sess = waf_session(p)
+                        r = sess.get(url, timeout=TIMEOUT, allow_redirects=True)
+                        html = r.text
 
-                page.goto(url, wait_until="domcontentloaded", timeout=60000)
+                    if is_waf_challenge(html):
+                        failed += 1
+                        print(f"{app_ref} | WAF challenge still present")
+                        continue
 
-                # Give JS challenge time if it triggers; also allow auto reload.
-                # We wait for either known content to appear, or just settle.
-                try:
-                    page.wait_for_timeout(1500)
-                except PWTimeoutError:
-                    pass
+                    if r.status_code != 200:
+                        failed += 1
+                        print(f"{app_ref} | HTTP {r.status_code} | {url}")
+                        continue
 
-                html = page.content()
+                    proposal, decision, date_received, date_decided = extract_fields(html)
+                    decision_type = decision_type_from_decision(decision)
 
-                # If we still got the AWS WAF challenge HTML, mark failed
-                if "challenge.js" in html or "AwsWafIntegration" in html:
-                    failed += 1
-                    print(f"{app_ref} | WAF challenge still present")
-                    continue
+                    if not any([proposal, decision, date_received, date_decided, decision_type]):
+                        failed += 1
+                        print(f"{app_ref} | 200-ish but no fields extracted")
+                        continue
 
-                proposal, decision, date_received, date_decided = extract_fields(html)
-                decision_type = decision_type_from_decision(decision)
+                    pending.append((proposal, decision, decision_type, date_received, date_decided, app_id))
+                    if len(pending) >= WRITE_BATCH:
+                        flush_pending()
+                    updated += 1
 
-                if not any([proposal, decision, date_received, date_decided, decision_type]):
-                    failed += 1
-                    print(f"{app_ref} | 200-ish but no fields extracted")
-                    continue
+                    if updated % 10 == 0:
+                        print(f"Updated {updated}/{attempted} ...")
 
-                conn.execute(
-                    """
-                    UPDATE applications
-                    SET
-                      proposal = CASE WHEN proposal IS NULL OR proposal = '' THEN COALESCE(?, proposal) ELSE proposal END,
-                      decision = COALESCE(?, decision),
-                      decision_type = COALESCE(?, decision_type),
-                      date_received = COALESCE(?, date_received),
-                      date_decided = COALESCE(?, date_decided)
-                    WHERE id = ?
-                    """,
-                    (proposal, decision, decision_type, date_received, date_decided, app_id),
-                )
-                conn.commit()
-                updated += 1
-
-                if updated % 10 == 0:
-                    print(f"Updated {updated}/{attempted} ...")
-
-                time.sleep(args.sleep)
-
-            except Exception as e:
-                failed += 1
-                print(f"{app_ref} | ERROR | {e}")
-
-        context.close()
-        browser.close()
+                    time.sleep(args.sleep)
+
+                except Exception as e:
+                    failed += 1
+                    print(f"{app_ref} | ERROR | {e}")
+        finally:
+            # land any partial batch even if the run dies partway
+            flush_pending()
+            sess.close()
 
     conn.close()
 
@@ -1,8 +1,9 @@
 import argparse
-import json
+import io
 import re
-import sqlite3
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
 from datetime import datetime, date
 from pathlib import Path
@@ -10,7 +11,12 @@ from typing import Dict, List, Optional, Tuple
 from urllib.parse import urljoin
 
 import requests
-from bs4 import BeautifulSoup
+from lxml import etree
+
+try:
+    from scripts._db import db_open, ensure_enrich_columns, MISSING_WHERE
+except ImportError:
+    from _db import db_open, ensure_enrich_columns, MISSING_WHERE
 
 DB_PATH = Path("data/processed/planning.db")
 COUNCIL = "Newcastle City Council"
@@ -23,12 +29,46 @@ HEADERS = {
 
 TIMEOUT = 45
 DATE_RE = re.compile(r"\b(\d{2}/\d{2}/\d{4})\b")
+_WS_RE = re.compile(r"\s+")
 
 # deterministic backoff for 202 "not ready yet"
 BACKOFFS = [1.0, 2.0, 4.0, 8.0]
 
+# commit one batch instead of fsyncing per row
+WRITE_BATCH = 100
+
+UPDATE_SQL = """
+UPDATE applications
+SET
+  proposal = CASE WHEN proposal IS NULL OR proposal = '' THEN COALESCE(?, proposal) ELSE proposal END,
+  decision = COALESCE(?, decision),
+  decision_type = COALESCE(?, decision_type),
+  date_received = COALESCE(?, date_received),
+  date_decided = COALESCE(?, date_decided)
+WHERE id = ?
+"""
+
+class RateLimiter:
+    """Spaces request starts evenly across all workers so the pool stays
+    as polite as the old serial sleep."""
+    def __init__(self, interval: float):
+        self.interval = max(interval, 0.0)
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
 def norm(s: str) -> str:
-    return " ".join((s or "").strip().split())
+    # single compiled-regex pass; runs on every cell of every page
+    return _WS_RE.sub(" ", s).strip() if s else ""
 
 def parse_date_any(s: str) -> Optional[str]:
     s = norm(s)
@@ -41,80 +81,97 @@ def parse_date_any(s: str) -> Optional[str]:
     except ValueError:
         return None
 
+# One compiled alternation instead of six serial substring tests; group
+# names double as the return values. The prior-approval phrases come
+# first so they win over the bare "approve" substring they contain.
+_DT_RE = re.compile(
+    r"(?P<prior_approval_not_required>prior approval not required)"
+    r"|(?P<prior_approval_required>prior approval required)"
+    r"|(?P<approved>approve|granted|permit)"
+    r"|(?P<refused>refus|rejected)"
+    r"|(?P<withdrawn>withdraw)"
+    r"|(?P<declined>declin)",
+    re.I,
+)
+
 def decision_type_from_decision(decision: Optional[str]) -> Optional[str]:
     if not decision:
         return None
-    d = decision.lower()
-    if "approve" in d or "granted" in d or "permit" in d:
-        return "approved"
-    if "refus" in d or "rejected" in d:
-        return "refused"
-    if "withdraw" in d:
-        return "withdrawn"
-    if "declin" in d:
-        return "declined"
-    if "prior approval not required" in d:
-        return "prior_approval_not_required"
-    if "prior approval required" in d:
-        return "prior_approval_required"
-    return None
+    m = _DT_RE.search(decision)
+    return m.lastgroup if m else None
 
 def fetch_details_with_retry(sess: requests.Session, url: str) -> Tuple[int, str]:
     """
-    Returns (status, html). Retries if server returns 202.
+    Returns (status, html). Retries if server returns 202 ("not ready
+    yet") or 429, with exponential backoff.
     """
     r = sess.get(url, timeout=TIMEOUT, allow_redirects=True)
-    if r.status_code != 202:
+    if r.status_code not in (202, 429):
         return r.status_code, r.text
 
-    # Retry on 202 with deterministic backoff
     for b in BACKOFFS:
         time.sleep(b)
         r2 = sess.get(url, timeout=TIMEOUT, allow_redirects=True)
-        if r2.status_code != 202:
+        if r2.status_code not in (202, 429):
             return r2.status_code, r2.text
 
     return r.status_code, r.text
 
-def extract_pairs(soup: BeautifulSoup) -> Dict[str, str]:
+def _text(el) -> str:
+    return etree.tostring(el, method="text", encoding="unicode")
+
+def extract_pairs(html: str) -> Dict[str, str]:
     """
-    Collect label/value pairs from common structures: tables and dt/dd lists.
+    Collect label/value pairs from common structures: tables and dt/dd
+    lists. iterparse emits end events per <tr>/<dl> and each element is
+    cleared once handled, so RSS stays flat instead of holding a full
+    DOM for the whole page.
     """
     pairs: Dict[str, str] = {}
 
-    # Table rows
-    for tr in soup.find_all("tr"):
-        cells = tr.find_all(["th", "td"])
-        if len(cells) >= 2:
-            k = norm(cells[0].get_text(" ", strip=True)).lower()
-            v = norm(cells[1].get_text(" ", strip=True))
-            if k and v:
-                pairs[k] = v
-
-    # Definition lists
-    for dl in soup.find_all("dl"):
-        dts = dl.find_all("dt")
-        for dt_tag in dts:
-            dd_tag = dt_tag.find_next_sibling("dd")
-            if not dd_tag:
-                continue
-            k = norm(dt_tag.get_text(" ", strip=True)).lower()
-            v = norm(dd_tag.get_text(" ", strip=True))
-            if k and v:
-                pairs[k] = v
+    for _, elem in etree.iterparse(
+        io.BytesIO(html.encode("utf-8", "replace")),
+        html=True,
+        events=("end",),
+        tag=("tr", "dl"),
+    ):
+        if elem.tag == "tr":
+            cells = elem.xpath("./th|./td")
+            if len(cells) >= 2:
+                k = norm(_text(cells[0])).lower()
+                v = norm(_text(cells[1]))
+                if k and v:
+                    pairs[k] = v
+        else:  # dl
+            for dt_tag in elem.xpath("./dt"):
+                dd = dt_tag.xpath("following-sibling::dd[1]")
+                if not dd:
+                    continue
+                k = norm(_text(dt_tag)).lower()
+                v = norm(_text(dd[0]))
+                if k and v:
+                    pairs[k] = v
+        elem.clear(keep_tail=True)
 
     return pairs
 
 def extract_fields_from_details(html: str) -> Tuple[Optional[str], Optional[str], Optional[str], Optional[str]]:
-    soup = BeautifulSoup(html, "lxml")
-    pairs = extract_pairs(soup)
-
-    proposal = None
-    decision = None
-    date_received = None
-    date_decided = None
-
-    # Label matching (flexible)
+    pairs = extract_pairs(html)
+
+    # Exact-label fast path first: most Idox pages use these keys
+    # verbatim, so we usually skip the whole-dict substring scan and only
+    # date-parse the values that can hold dates.
+    proposal = pairs.get("proposal") or pairs.get("description")
+    decision = pairs.get("decision")
+    date_received = parse_date_any(pairs.get("date received") or pairs.get("valid from") or "")
+    date_decided = parse_date_any(
+        pairs.get("decision issued") or pairs.get("decision date") or pairs.get("decided") or ""
+    )
+
+    if proposal and decision and date_received and date_decided:
+        return proposal, decision, date_received, date_decided
+
+    # Label matching (flexible) for whatever is still missing
     for k, v in pairs.items():
         if proposal is None and ("proposal" in k or "description" in k):
             proposal = v
@@ -137,36 +194,49 @@ def extract_fields_from_details(html: str) -> Tuple[Optional[str], Optional[str]
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--limit", type=int, default=100)
-    ap.add_argument("--sleep", type=float, default=0.5)
+    ap.add_argument("--sleep", type=float, default=0.5, help="Minimum spacing between request starts, shared across workers")
+    ap.add_argument("--workers", type=int, default=8)
     ap.add_argument("--recent-years", type=int, default=3, help="Only enrich applications from last N years (by week_start in raw_json)")
     args = ap.parse_args()
 
     if not DB_PATH.exists():
         raise SystemExit(f"❌ DB not found: {DB_PATH}")
 
-    conn = sqlite3.connect(DB_PATH)
-    conn.execute("PRAGMA journal_mode=WAL;")
+    conn = db_open(DB_PATH)
 
     sess = requests.Session()
     sess.headers.update(HEADERS)
+    # bigger pool than the default 10 so future concurrent fetches don't
+    # queue behind each other
+    adapter = requests.adapters.HTTPAdapter(pool_connections=16, pool_maxsize=16)
+    sess.mount("https://", adapter)
+    sess.mount("http://", adapter)
+
+    # Buffer UPDATE params and commit per batch — the per-row commit
+    # forced an fsync per application and dominated DB wall time.
+    pending = []
+
+    def flush_pending():
+        if not pending:
+            return
+        conn.executemany(UPDATE_SQL, pending)
+        conn.commit()
+        pending.clear()
 
     try:
         # Only last N years (based on recorded week_start in raw_json)
         cutoff = (date.today().replace(year=date.today().year - args.recent_years)).isoformat()
 
+        ensure_enrich_columns(conn)
+
         rows = conn.execute(
-            """
-            SELECT id, application_ref, raw_json
+            f"""
+            SELECT id, application_ref, details_url
             FROM applications
             WHERE council = ?
-              AND raw_json LIKE '%"details_url"%'
-              AND raw_json LIKE '%"week_start"%'
-              AND (decision IS NULL OR decision = '' OR date_decided IS NULL OR date_decided = '')
-              AND (
-                   substr(
-                     json_extract(raw_json, '$.week_start'), 1, 10
-                   ) >= ?
-              )
+              AND details_url IS NOT NULL
+              AND ({MISSING_WHERE})
+              AND week_start_date >= ?
             ORDER BY id ASC
             LIMIT ?
             """,
@@ -182,59 +252,58 @@ def main():
         failed = 0
         seen_202 = 0
 
-        for (app_id, app_ref, raw_json) in rows:
-            attempted += 1
-            try:
-                meta = json.loads(raw_json) if raw_json else {}
-                url = meta.get("details_url")
-                if not url:
-                    continue
-
-                status, html = fetch_details_with_retry(sess, url)
-                if status == 202:
-                    seen_202 += 1
-                    failed += 1
-                    print(f"{app_ref} | HTTP 202 persisted | {url}")
-                    continue
-
-                if status != 200:
+        # Fetch on a thread pool — the loop is network-bound, and every
+        # fetch is independent. Request starts stay spaced out by the
+        # shared limiter; parsing and all DB writes remain on the main
+        # thread so sqlite sees a single writer.
+        limiter = RateLimiter(args.sleep)
+        tasks = [(app_id, app_ref, url) for (app_id, app_ref, url) in rows]
+
+        def fetch_one(app_id, app_ref, url):
+            limiter.wait()
+            status, html = fetch_details_with_retry(sess, url)
+            return status, html
+
+        with ThreadPoolExecutor(max_workers=args.workers) as ex:
+            futures = {ex.submit(fetch_one, *t): t for t in tasks}
+            for fut in as_completed(futures):
+                app_id, app_ref, url = futures[fut]
+                attempted += 1
+                try:
+                    status, html = fut.result()
+                    if status == 202:
+                        seen_202 += 1
+                        failed += 1
+                        print(f"{app_ref} | HTTP 202 persisted | {url}")
+                        continue
+
+                    if status != 200:
+                        failed += 1
+                        print(f"{app_ref} | HTTP {status} | {url}")
+                        continue
+
+                    proposal, decision, date_received, date_decided = extract_fields_from_details(html)
+                    decision_type = decision_type_from_decision(decision)
+
+                    # Only count as updated if we found *something* to write
+                    if not any([proposal, decision, decision_type, date_received, date_decided]):
+                        failed += 1
+                        print(f"{app_ref} | 200 but no fields extracted | {url}")
+                        continue
+
+                    pending.append((proposal, decision, decision_type, date_received, date_decided, app_id))
+                    if len(pending) >= WRITE_BATCH:
+                        flush_pending()
+                    updated += 1
+
+                    if updated % 25 == 0:
+                        print(f"Updated {updated}/{attempted} ...")
+
+                except Exception as e:
                     failed += 1
-                    print(f"{app_ref} | HTTP {status} | {url}")
-                    continue
-
-                proposal, decision, date_received, date_decided = extract_fields_from_details(html)
-                decision_type = decision_type_from_decision(decision)
-
-                # Only count as updated if we found *something* to write
-                if not any([proposal, decision, decision_type, date_received, date_decided]):
-                    failed += 1
-                    print(f"{app_ref} | 200 but no fields extracted | {url}")
-                    continue
+                    print(f"{app_ref} | ERROR | {e}")
 
-                conn.execute(
-                    """
-                    UPDATE applications
-                    SET
-                      proposal = CASE WHEN proposal IS NULL OR proposal = '' THEN COALESCE(?, proposal) ELSE proposal END,
-                      decision = COALESCE(?, decision),
-                      decision_type = COALESCE(?, decision_type),
-                      date_received = COALESCE(?, date_received),
-                      date_decided = COALESCE(?, date_decided)
-                    WHERE id = ?
-                    """,
-                    (proposal, decision, decision_type, date_received, date_decided, app_id),
-                )
-                conn.commit()
-                updated += 1
-
-                if updated % 25 == 0:
-                    print(f"Updated {updated}/{attempted} ...")
-
-                time.sleep(args.sleep)
-
-            except Exception as e:
-                failed += 1
-                print(f"{app_ref} | ERROR | {e}")
+        flush_pending()
 
         print("\n✅ DONE")
         print("Rows attempted:", attempted)
@@ -243,6 +312,7 @@ def main():
         print("Rows stuck at 202:", seen_202)
 
     finally:
+        flush_pending()
         conn.close()
         sess.close()
 
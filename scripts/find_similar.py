@@ -1,20 +1,166 @@
 import sqlite3
 import argparse
+import json
+from pathlib import Path
+
 import numpy as np
 from sentence_transformers import SentenceTransformer
 
+try:
+    import faiss
+except ImportError:
+    faiss = None
+
+try:
+    from scripts._db import db_open
+except ImportError:
+    from _db import db_open
+
 DB_PATH = "data/processed/planning.db"
 COUNCIL = "Newcastle City Council"
 
-def from_blob(b: bytes, dim: int) -> np.ndarray:
-    v = np.frombuffer(b, dtype=np.float32)
-    if dim and v.shape[0] != dim:
-        v = v[:dim]
-    return v
+# Packed float32 matrix + parallel row-id array, built once and memmapped
+# per query: one BLAS mat @ q replaces per-row blob decode and vstack.
+INDEX_DIR = Path("index")
+MAT_PATH = INDEX_DIR / "embeddings.f32"
+MAT_I8_PATH = INDEX_DIR / "embeddings.i8"
+META_PATH = INDEX_DIR / "embeddings_meta.json"
+IDS_PATH = INDEX_DIR / "row_ids.i64"
+FAISS_PATH = INDEX_DIR / "find_similar.faiss"
+
+def build_matrix_cache(conn, model_name: str) -> int:
+    """Dump every embedding for the council/model into a contiguous
+    float32 file plus a parallel int64 row-id file. Returns row count."""
+    INDEX_DIR.mkdir(parents=True, exist_ok=True)
+    # plain-tuple cursor: no sqlite3.Row wrapper per embedding row, and
+    # only the columns the build actually needs
+    cur = conn.cursor()
+    cur.row_factory = None
+    # dtype/scale describe how build_embeddings_local stored each BLOB
+    # (--dtype fp16/int8 land here); upcast everything to fp32 so the
+    # packed matrix is uniform. Older DBs predate the columns.
+    try:
+        cur.execute(
+            """
+            SELECT e.application_id, e.embedding, COALESCE(e.dtype, 'fp32'), e.scale
+            FROM embeddings e
+            JOIN applications a ON a.id = e.application_id
+            WHERE a.council=? AND e.model_name=?
+            ORDER BY e.application_id
+            """,
+            (COUNCIL, model_name),
+        )
+    except sqlite3.OperationalError:
+        cur.execute(
+            """
+            SELECT e.application_id, e.embedding, 'fp32', NULL
+            FROM embeddings e
+            JOIN applications a ON a.id = e.application_id
+            WHERE a.council=? AND e.model_name=?
+            ORDER BY e.application_id
+            """,
+            (COUNCIL, model_name),
+        )
+    ids = []
+    dim = 0
+    store_dtypes = set()
+    with open(MAT_PATH, "wb") as f:
+        for app_id, blob, store_dtype, store_scale in cur:
+            if store_dtype == "fp16":
+                vec = np.frombuffer(blob, dtype=np.float16).astype(np.float32)
+            elif store_dtype == "int8":
+                # the writer stored round(v / scale) with scale = max/127,
+                # so multiplying by the stored scale recovers v
+                vec = np.frombuffer(blob, dtype=np.int8).astype(np.float32) * (store_scale or 1.0)
+            else:
+                vec = np.frombuffer(blob, dtype=np.float32)
+            if not dim:
+                dim = vec.shape[0]
+            f.write(vec.tobytes())
+            ids.append(app_id)
+            store_dtypes.add(store_dtype)
+    np.asarray(ids, dtype=np.int64).tofile(IDS_PATH)
+
+    if not ids:
+        return 0
+
+    mat = np.memmap(MAT_PATH, dtype=np.float32, mode="r").reshape(-1, dim)
 
-def cosine_sim_matrix(query_vec: np.ndarray, mat: np.ndarray) -> np.ndarray:
-    # If vectors are normalized, cosine = dot product
-    return mat @ query_vec
+    # int8 copy with one symmetric scale: 4x less bandwidth per scan,
+    # and positive scaling never changes the ranking
+    scale = float(np.abs(mat).max()) / 127.0 or 1.0
+    np.clip(np.round(mat / scale), -127, 127).astype(np.int8).tofile(MAT_I8_PATH)
+    # model, row count and storage dtypes key the cache: a --model or DB
+    # change must not silently score queries against stale embeddings
+    META_PATH.write_text(
+        json.dumps({
+            "dim": dim,
+            "scale": scale,
+            "model": model_name,
+            "rows": len(ids),
+            "store": sorted(store_dtypes),
+        }),
+        encoding="utf-8",
+    )
+
+    # HNSW graph over scalar-quantized (8-bit) vectors: sublinear search
+    # plus 4x smaller index; row order matches the id array, so FAISS
+    # result ids index straight into it
+    if faiss is not None:
+        dense = np.ascontiguousarray(mat)
+        index = faiss.IndexHNSWSQ(dim, faiss.ScalarQuantizer.QT_8bit, 32, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = 200
+        index.train(dense)
+        index.add(dense)
+        faiss.write_index(index, str(FAISS_PATH))
+    else:
+        # don't leave an index from a previous build lying around for
+        # the FAISS path to pick up against the new matrix
+        FAISS_PATH.unlink(missing_ok=True)
+
+    return len(ids)
+
+def cache_is_stale(conn, model_name: str) -> bool:
+    """True when the packed cache is missing or was built for a
+    different model or row count than the DB currently holds."""
+    if not (MAT_PATH.exists() and IDS_PATH.exists() and META_PATH.exists()):
+        return True
+    try:
+        meta = json.loads(META_PATH.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return True
+    if meta.get("model") != model_name:
+        return True
+    cur = conn.cursor()
+    cur.row_factory = None
+    (n,) = cur.execute(
+        """
+        SELECT COUNT(*)
+        FROM embeddings e
+        JOIN applications a ON a.id = e.application_id
+        WHERE a.council=? AND e.model_name=?
+        """,
+        (COUNCIL, model_name),
+    ).fetchone()
+    if meta.get("rows") != n:
+        return True
+    # re-encoding with a different --dtype changes the stored BLOBs
+    # without changing the row count
+    try:
+        stored = sorted(
+            d for (d,) in cur.execute(
+                """
+                SELECT DISTINCT COALESCE(e.dtype, 'fp32')
+                FROM embeddings e
+                JOIN applications a ON a.id = e.application_id
+                WHERE a.council=? AND e.model_name=?
+                """,
+                (COUNCIL, model_name),
+            )
+        )
+    except sqlite3.OperationalError:
+        stored = ["fp32"]
+    return stored != meta.get("store", ["fp32"])
 
 def main():
     ap = argparse.ArgumentParser()
@@ -22,44 +168,96 @@ def main():
     ap.add_argument("--topk", type=int, default=10)
     ap.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2")
     ap.add_argument("--only-decided", action="store_true", help="Search only among decided apps")
+    ap.add_argument("--rebuild-cache", action="store_true", help="Rebuild the packed embedding matrix from the DB")
     args = ap.parse_args()
 
     model = SentenceTransformer(args.model)
     q = model.encode([args.text], normalize_embeddings=True)[0].astype(np.float32)
 
-    conn = sqlite3.connect(DB_PATH)
+    conn = db_open(DB_PATH)
     conn.row_factory = sqlite3.Row
     try:
-        where = "WHERE a.council=? AND e.model_name=?"
-        params = [COUNCIL, args.model]
-
-        if args.only_decided:
-            where += " AND a.decision IS NOT NULL AND a.decision<>''"
-
-        rows = conn.execute(
-            f"""
-            SELECT a.id, a.application_ref, a.proposal, a.decision, a.decision_type, a.week_decided,
-                   e.embedding, e.embedding_dim
-            FROM applications a
-            JOIN embeddings e ON e.application_id = a.id
-            {where}
-            """,
-            params
-        ).fetchall()
+        if args.rebuild_cache or cache_is_stale(conn, args.model):
+            n = build_matrix_cache(conn, args.model)
+            if not n:
+                raise SystemExit("❌ No embedded rows found. Run build_embeddings_local.py first.")
+            print(f"(rebuilt embedding cache: {n} rows)")
+
+        ids = np.fromfile(IDS_PATH, dtype=np.int64)
+        dim = q.shape[0]
+
+        if faiss is not None and FAISS_PATH.exists() and not args.only_decided:
+            # graph search: sublinear, no full matrix pass at all
+            index = faiss.read_index(str(FAISS_PATH))
+            try:
+                index.hnsw.efSearch = 64
+            except AttributeError:
+                pass
+            k = min(args.topk, index.ntotal)
+            scores, nbrs = index.search(q.reshape(1, -1), k)
+            idx = nbrs[0]
+            top_scores = scores[0]
+        else:
+            # brute path (also used for --only-decided, which needs to
+            # mask arbitrary rows before selection)
+            if MAT_I8_PATH.exists() and META_PATH.exists():
+                # int8 matrix: quarter the bytes streamed per query; the
+                # int32 product is a positive rescale of the true dot,
+                # so the ranking is unchanged
+                mat = np.memmap(MAT_I8_PATH, dtype=np.int8, mode="r").reshape(-1, dim)
+                mscale = json.loads(META_PATH.read_text(encoding="utf-8"))["scale"]
+                qscale = float(np.abs(q).max()) / 127.0 or 1.0
+                q8 = np.clip(np.round(q / qscale), -127, 127).astype(np.int32)
+                # widen to int32 in bounded chunks: one full-matrix
+                # astype would materialize 4x the int8 size in RAM,
+                # which is exactly the fp32 footprint this path avoids
+                sims = np.empty(mat.shape[0], dtype=np.float32)
+                step = 65536
+                for i in range(0, mat.shape[0], step):
+                    sims[i:i + step] = mat[i:i + step].astype(np.int32) @ q8
+                # rescale back so printed scores stay on the cosine scale
+                sims *= mscale * qscale
+            else:
+                mat = np.memmap(MAT_PATH, dtype=np.float32, mode="r").reshape(-1, dim)
+                # normalized vectors: cosine == dot product, one GEMV over the mmap
+                sims = mat @ q
 
-        if not rows:
-            raise SystemExit("❌ No embedded rows found. Run build_embeddings_local.py first.")
+            if args.only_decided:
+                dcur = conn.cursor()
+                dcur.row_factory = None
+                dcur.execute(
+                    "SELECT id FROM applications WHERE council=? AND decision IS NOT NULL AND decision<>''",
+                    (COUNCIL,),
+                )
+                decided_ids = np.fromiter((i for (i,) in dcur), dtype=np.int64)
+                mask = np.isin(ids, decided_ids)
+                sims = np.where(mask, sims, -np.inf)
 
-        vecs = np.vstack([from_blob(r["embedding"], r["embedding_dim"]) for r in rows]).astype(np.float32)
-        sims = cosine_sim_matrix(q, vecs)
+            # top-k selection without sorting the whole similarity vector
+            k = min(args.topk, len(sims))
+            part = np.argpartition(-sims, k - 1)[:k]
+            idx = part[np.argsort(-sims[part])]
+            top_scores = sims[idx]
 
-        idx = np.argsort(-sims)[:args.topk]
+        top_ids = [int(ids[i]) for i in idx]
+        placeholders = ",".join("?" * len(top_ids))
+        meta = {
+            r["id"]: r
+            for r in conn.execute(
+                f"""
+                SELECT id, application_ref, proposal, decision, decision_type, week_decided
+                FROM applications
+                WHERE id IN ({placeholders})
+                """,
+                top_ids,
+            )
+        }
 
         print("\n=== Top matches ===")
         results = []
-        for rank, i in enumerate(idx, 1):
-            r = rows[int(i)]
-            score = float(sims[int(i)])
+        for rank, (i, score) in enumerate(zip(idx, top_scores), 1):
+            r = meta[int(ids[i])]
+            score = float(score)
             results.append(r)
             print(f"\n{rank:02d}. score={score:.4f}  ref={r['application_ref']}  type={r['decision_type'] or ''}  week={r['week_decided'] or ''}")
             print(f"    decision: {r['decision'] or ''}")
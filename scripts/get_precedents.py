@@ -12,6 +12,21 @@ def main():
     ap.add_argument("-k", type=int, default=5, help="Top K results")
     args = ap.parse_args()
 
+    # Thin-client mode: a running precedents_server already holds the
+    # model and index, so skip the multi-second load entirely.
+    service_url = os.getenv("PRECEDENTS_SERVICE_URL")
+    if service_url:
+        import requests
+
+        resp = requests.post(
+            service_url.rstrip("/") + "/precedents",
+            json={"query": args.query, "k": args.k},
+            timeout=30,
+        )
+        resp.raise_for_status()
+        print(json.dumps(resp.json()["results"], ensure_ascii=False))
+        return
+
     root = Path(__file__).resolve().parents[1]
 
     faiss_path = Path(os.getenv(
@@ -28,6 +43,12 @@ def main():
         return
 
     index = faiss.read_index(str(faiss_path))
+    # IVF indexes default to nprobe=1 (1 of 256 clusters) — recall
+    # collapses without this
+    if hasattr(index, "nprobe"):
+        index.nprobe = 16
+    if hasattr(index, "hnsw"):
+        index.hnsw.efSearch = 64
     meta = json.loads(meta_path.read_text(encoding="utf-8"))
 
     # YOUR schema: {"model":..., "count":..., "meta":[...]}
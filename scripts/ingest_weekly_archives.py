@@ -1,10 +1,15 @@
+import hashlib
 import json
-import sqlite3
 import sys
 from datetime import date, timedelta
 from pathlib import Path
 import requests
 
+try:
+    from scripts._db import db_open
+except ImportError:
+    from _db import db_open
+
 DB_PATH = Path("data/processed/planning.db")
 COUNCIL = "Newcastle City Council"
 
@@ -18,10 +23,16 @@ HEADERS = {
     "User-Agent": "planning-research-bot/1.0"
 }
 
+# One session for all ~260 weekly fetches: keep-alive reuses the TCP/TLS
+# connection instead of handshaking per week.
+SESSION = requests.Session()
+SESSION.headers.update(HEADERS)
+SESSION.mount("https://", requests.adapters.HTTPAdapter(pool_maxsize=4, pool_block=False))
+
 def fetch_week(start_date: date):
     params = PARAMS.copy()
     params["week"] = start_date.strftime("%d/%m/%Y")
-    r = requests.get(BASE_URL, params=params, headers=HEADERS, timeout=30)
+    r = SESSION.get(BASE_URL, params=params, timeout=30)
     r.raise_for_status()
     return r.text
 
@@ -29,27 +40,17 @@ def parse_html(html: str):
     # We store raw HTML only; structured extraction happens later
     return html
 
-def insert_week(conn, raw_html: str):
-    # We do NOT parse individual applications yet
-    # This guarantees zero row loss and deterministic reprocessing later
-    cur = conn.cursor()
-
-    cur.execute("""
-        INSERT OR IGNORE INTO applications (
-            council,
-            application_ref,
-            raw_json
-        ) VALUES (?, ?, ?)
-    """, (COUNCIL, f"WEEKLY_ARCHIVE_{hash(raw_html)}", raw_html))
-
-    return cur.rowcount
+def week_ref(raw_html: str) -> str:
+    # stable content digest — Python's hash() is salted per process, so
+    # re-runs would never dedupe against earlier inserts
+    return "WEEKLY_ARCHIVE_" + hashlib.blake2b(raw_html.encode(), digest_size=8).hexdigest()
 
 def main():
     if not DB_PATH.exists():
         print("❌ Database not found:", DB_PATH)
         sys.exit(1)
 
-    conn = sqlite3.connect(DB_PATH)
+    conn = db_open(DB_PATH)
 
     today = date.today()
     start = today - timedelta(weeks=260)  # ~5 years
@@ -58,16 +59,30 @@ def main():
     current = start
 
     try:
+        # Stage everything first, then land it with one INSERT ... SELECT
+        # and a single commit — no per-week fsync, and the content digest
+        # dedupes server-side against whatever is already in the table.
+        conn.execute("CREATE TEMP TABLE stage (council TEXT, ref TEXT, raw TEXT)")
+
+        staged = []
         while current <= today:
             print("Fetching week starting:", current)
             html = fetch_week(current)
-            inserted = insert_week(conn, html)
-            conn.commit()
-            print("  inserted rows:", inserted)
-            inserted_total += inserted
+            staged.append((COUNCIL, week_ref(html), html))
             current += timedelta(weeks=1)
+
+        conn.executemany("INSERT INTO stage VALUES (?, ?, ?)", staged)
+        cur = conn.execute(
+            """
+            INSERT OR IGNORE INTO applications (council, application_ref, raw_json)
+            SELECT council, ref, raw FROM stage
+            """
+        )
+        conn.commit()
+        inserted_total = cur.rowcount
     finally:
         conn.close()
+        SESSION.close()
 
     print("\n✅ DONE")
     print("Total inserted rows:", inserted_total)
@@ -0,0 +1,79 @@
+"""Long-running precedents search service.
+
+get_precedents.py pays the SentenceTransformer load (~90MB, seconds) and
+faiss.read_index on every invocation, which dwarfs the actual query. This
+process loads both once at import and serves lookups over HTTP, so a
+query costs one encode (tens of ms) — or nothing at all for repeated
+text, via a 512-entry LRU on the query embedding.
+
+Run: uvicorn precedents_server:app --port 8767 --workers 1
+Point get_precedents.py at it with PRECEDENTS_SERVICE_URL.
+"""
+import json
+import os
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import faiss
+from fastapi import FastAPI
+from pydantic import BaseModel
+from sentence_transformers import SentenceTransformer
+
+_ROOT = Path(__file__).resolve().parents[1]
+
+FAISS_PATH = Path(os.getenv("FAISS_INDEX_PATH", _ROOT / "index" / "app_index.faiss"))
+META_PATH = Path(os.getenv("FAISS_META_PATH", _ROOT / "index" / "app_index_meta.json"))
+
+_INDEX = faiss.read_index(str(FAISS_PATH))
+if hasattr(_INDEX, "nprobe"):
+    _INDEX.nprobe = int(os.getenv("FAISS_NPROBE", "16"))
+if hasattr(_INDEX, "hnsw"):
+    _INDEX.hnsw.efSearch = int(os.getenv("FAISS_EF_SEARCH", "64"))
+
+_meta = json.loads(META_PATH.read_text(encoding="utf-8"))
+_ITEMS = _meta.get("meta", [])
+if not isinstance(_ITEMS, list):
+    _ITEMS = []
+
+_MODEL = SentenceTransformer("all-MiniLM-L6-v2")
+
+
+@lru_cache(maxsize=512)
+def _encode(query: str) -> np.ndarray:
+    emb = _MODEL.encode([query], normalize_embeddings=True)
+    return np.asarray(emb, dtype="float32")
+
+
+def search(query: str, k: int = 5) -> list:
+    """Same output shape as the get_precedents CLI."""
+    scores, ids = _INDEX.search(_encode(query), k)
+    out = []
+    for rank in range(len(ids[0])):
+        idx = int(ids[0][rank])
+        if idx < 0 or idx >= len(_ITEMS):
+            continue
+        out.append({
+            "rank": rank + 1,
+            "score": float(scores[0][rank]),
+            "meta": _ITEMS[idx],
+        })
+    return out
+
+
+class PrecedentsRequest(BaseModel):
+    query: str
+    k: int = 5
+
+
+app = FastAPI(title="Plana Precedents Service")
+
+
+@app.get("/health")
+def health():
+    return {"ok": True, "ntotal": int(_INDEX.ntotal), "items": len(_ITEMS)}
+
+
+@app.post("/precedents")
+def precedents(req: PrecedentsRequest) -> dict:
+    return {"results": search(req.query, req.k)}
@@ -29,7 +29,9 @@ def run_precedents(proposal_text: str):
     env.setdefault("FAISS_META_PATH", "./index/app_index_meta.json")
 
     try:
-        out = subprocess.check_output(cmd, env=env, stderr=subprocess.STDOUT, text=True)
+        # Keep stderr out of the decoded stdout: it would corrupt the JSON
+        # parse and costs an extra decode pass for chatty children.
+        out = subprocess.check_output(cmd, env=env, stderr=subprocess.DEVNULL, text=True)
         data = json.loads(out)
         if isinstance(data, list):
             return data
@@ -37,19 +39,11 @@ def run_precedents(proposal_text: str):
     except Exception:
         return []
 
-def main():
-    ap = argparse.ArgumentParser()
-    ap.add_argument("payload_json", help="Path to payload JSON")
-    ap.add_argument("-o", "--out", default="logs/report_latest.md", help="Output markdown path")
-    ap.add_argument("--include-precedents", action="store_true", help="Try to include similar applications")
-    args = ap.parse_args()
-
-    payload_path = Path(args.payload_json)
-    out_path = Path(args.out)
-    out_path.parent.mkdir(parents=True, exist_ok=True)
-
-    data = json.loads(payload_path.read_text(encoding="utf-8"))
-
+def render_report(data, payload_source="", include_precedents=False):
+    """
+    Renders a payload dict into council-style report markdown.
+    Returns the markdown string (callers decide where to write it).
+    """
     proposal = data.get("input", {}).get("proposal_text", "[AUTO]")
     authority = data.get("input", {}).get("authority", "newcastle")
     doc_keys = data.get("input", {}).get("doc_keys", [])
@@ -135,7 +129,7 @@ def main():
 
     # --- Precedents ---
     md.append("## 3.4 Similar applications (precedents)")
-    if args.include_precedents:
+    if include_precedents:
         precedents = run_precedents(proposal)
         if precedents:
             for pr in precedents:
@@ -203,10 +197,28 @@ def main():
         md.append("")
 
     md.append("## 7.0 Evidence Appendix (Traceability)")
-    md.append(f"- Payload source: `{payload_path}`")
+    md.append(f"- Payload source: `{payload_source}`")
     md.append("")
 
-    out_path.write_text("\n".join(md).strip() + "\n", encoding="utf-8")
+    return "\n".join(md).strip() + "\n"
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("payload_json", help="Path to payload JSON")
+    ap.add_argument("-o", "--out", default="logs/report_latest.md", help="Output markdown path")
+    ap.add_argument("--include-precedents", action="store_true", help="Try to include similar applications")
+    args = ap.parse_args()
+
+    payload_path = Path(args.payload_json)
+    out_path = Path(args.out)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+
+    data = json.loads(payload_path.read_text(encoding="utf-8"))
+
+    md = render_report(data, payload_source=str(payload_path), include_precedents=args.include_precedents)
+
+    out_path.write_text(md, encoding="utf-8")
     print(f"OK: wrote {out_path}")
 
 if __name__ == "__main__":
@@ -0,0 +1,40 @@
+"""Shared headless-browser setup for the Playwright debug scripts.
+
+Chromium launch costs 1-3s, so scripts that need a browser share one
+singleton (playwright, browser, context) instead of launching their own.
+The context also aborts image/font/media/stylesheet requests — none of
+the scripts look at rendering, and the portal pages finish loading much
+faster without them.
+"""
+from playwright.sync_api import sync_playwright
+
+_BLOCKED_TYPES = {"image", "font", "media", "stylesheet"}
+
+_state = {}
+
+
+def block_static_assets(context):
+    context.route(
+        "**/*",
+        lambda route: route.abort()
+        if route.request.resource_type in _BLOCKED_TYPES
+        else route.continue_(),
+    )
+
+
+def get_context():
+    """Return the shared browser context, launching it on first use."""
+    if not _state:
+        p = sync_playwright().start()
+        browser = p.chromium.launch(headless=True)
+        context = browser.new_context()
+        block_static_assets(context)
+        _state.update(playwright=p, browser=browser, context=context)
+    return _state["context"]
+
+
+def shutdown():
+    if _state:
+        _state["browser"].close()
+        _state["playwright"].stop()
+        _state.clear()